@@ -7,7 +7,7 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from src.config import Settings, get_settings
-from src.models.base import get_db
+from src.models.base import get_db, json_deserializer, json_serializer
 from src.core.project_registry import ProjectRegistry
 from src.core.session_manager import SessionManager
 from src.core.agent_runtime import AgentRuntime
@@ -114,6 +114,8 @@ def _get_background_session_factory() -> async_sessionmaker:
             _background_engine = create_async_engine(
                 settings.database_url,
                 echo=settings.debug,
+                json_serializer=json_serializer,
+                json_deserializer=json_deserializer,
             )
             _background_session_factory = async_sessionmaker(
                 _background_engine,
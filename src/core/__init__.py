@@ -23,7 +23,7 @@ from src.core.constants import (
     DEFAULT_LIST_LIMIT,
     DEFAULT_LIST_OFFSET,
 )
-from src.core.types import PendingApproval, MessageExtra
+from src.core.types import PendingApproval, MessageExtra, NewMessage
 
 __all__ = [
     # Base exception
@@ -56,4 +56,5 @@ __all__ = [
     # Types
     "PendingApproval",
     "MessageExtra",
+    "NewMessage",
 ]
@@ -1,20 +1,22 @@
 """Session Manager - Session lifecycle and message storage."""
 
-from datetime import datetime, timezone
-from typing import Any, Sequence
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Sequence
 
-from sqlalchemy import select, func, delete as sql_delete
+from sqlalchemy import exists, insert, lambda_stmt, select, func, update, delete as sql_delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, selectinload
 
 from src.models import Session, SessionStatus, Message, Project
+from src.models.base import utc_now
 from src.core.exceptions import (
     SessionNotFoundError,
     SessionStateError,
     ProjectNotFoundError,
 )
 from src.core.constants import LAST_PROMPT_MAX_LENGTH, DEFAULT_LIST_LIMIT, DEFAULT_LIST_OFFSET
-from src.core.types import PendingApproval
+from src.core.types import NewMessage, PendingApproval
 
 
 # Valid state transitions based on the state machine diagram
@@ -32,6 +34,19 @@ VALID_TRANSITIONS: dict[SessionStatus, set[SessionStatus]] = {
 }
 
 
+# The same graph keyed by the raw status strings stored on Session.status,
+# built once at import: a transition check is one dict hit plus one frozenset
+# membership test, with no enum construction or per-call tuple/set
+_NEXT_STATUSES: dict[str, frozenset[str]] = {
+    current.value: frozenset(target.value for target in targets)
+    for current, targets in VALID_TRANSITIONS.items()
+}
+
+# Stored status strings compared against on every transition
+_RUNNING = SessionStatus.RUNNING.value
+_WAITING_APPROVAL = SessionStatus.WAITING_APPROVAL.value
+
+
 class SessionManager:
     """Manages session lifecycle, message storage, and state transitions.
 
@@ -49,6 +64,13 @@ class SessionManager:
         RUNNING -> ERROR (error occurs)
         WAITING_APPROVAL -> RUNNING (approve/deny)
         ERROR -> RUNNING (retry)
+
+    Concurrency:
+        A manager wraps a single AsyncSession, which is not safe for
+        concurrent use — don't asyncio.gather() its methods. Independent
+        work that should overlap needs one manager (and db session) per
+        task; several rows for one project go through create_sessions /
+        add_messages in a single round-trip instead.
     """
 
     def __init__(self, db: AsyncSession):
@@ -58,6 +80,43 @@ class SessionManager:
             db: Async SQLAlchemy session
         """
         self.db = db
+        # Inside transaction() methods flush instead of committing
+        self._in_transaction = False
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["SessionManager"]:
+        """Group several manager calls into one commit.
+
+        Each method normally commits its own change. Inside this block they
+        only flush (so later calls and reads see earlier writes), and the
+        whole block commits once on exit — or rolls back if it raises.
+        Nested blocks join the outermost one.
+
+        Usage:
+            async with manager.transaction():
+                session = await manager.create_session(project_id)
+                await manager.add_message(session.id, "user", prompt)
+        """
+        if self._in_transaction:
+            yield self
+            return
+
+        self._in_transaction = True
+        try:
+            yield self
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
+        finally:
+            self._in_transaction = False
+
+    async def _commit(self) -> None:
+        """Commit, or just flush when inside transaction()."""
+        if self._in_transaction:
+            await self.db.flush()
+        else:
+            await self.db.commit()
 
     async def create_session(
         self,
@@ -80,12 +139,7 @@ class SessionManager:
         Raises:
             ProjectNotFoundError: If project doesn't exist
         """
-        # Verify project exists
-        result = await self.db.execute(
-            select(Project).where(Project.id == project_id)
-        )
-        if not result.scalar_one_or_none():
-            raise ProjectNotFoundError(f"Project not found: {project_id}")
+        await self._ensure_project_exists(project_id)
 
         session = Session(
             project_id=project_id,
@@ -97,12 +151,57 @@ class SessionManager:
             total_cost_usd=0.0,
         )
 
+        # Every column default (id, timestamps) is generated client-side and
+        # set on the object at flush, so there's nothing to refresh
         self.db.add(session)
-        await self.db.commit()
-        await self.db.refresh(session)
+        await self._commit()
 
         return session
 
+    async def create_sessions(
+        self,
+        project_id: str,
+        names: Sequence[str | None],
+    ) -> Sequence[Session]:
+        """Create several IDLE sessions for a project in one round-trip.
+
+        The project is checked once and all rows go out as a single
+        INSERT ... RETURNING, rather than a check, INSERT and commit per
+        session as with create_session.
+
+        Args:
+            project_id: The project's UUID
+            names: Display name for each session (None for unnamed), in order
+
+        Returns:
+            The created Sessions, in the same order as names
+
+        Raises:
+            ProjectNotFoundError: If project doesn't exist
+        """
+        await self._ensure_project_exists(project_id)
+
+        if not names:
+            return []
+
+        result = await self.db.scalars(
+            insert(Session).returning(Session, sort_by_parameter_order=True),
+            [
+                {
+                    "project_id": project_id,
+                    "name": name,
+                    "status": SessionStatus.IDLE.value,
+                    "message_count": 0,
+                    "total_cost_usd": 0.0,
+                }
+                for name in names
+            ],
+        )
+        sessions = result.all()
+        await self._commit()
+
+        return sessions
+
     async def get_session(
         self,
         session_id: str,
@@ -110,6 +209,15 @@ class SessionManager:
     ) -> Session:
         """Get a session by ID.
 
+        Without include_messages this is an identity-map lookup: a session
+        this manager's db session already holds (e.g. just created or
+        updated) comes back with no query at all.
+
+        Relationships are only available when asked for: with
+        include_messages the messages arrive via one extra SELECT ... IN;
+        otherwise every relationship is set to raise on access, so a stray
+        lazy load (an N+1, and an error under asyncio anyway) fails loudly.
+
         Args:
             session_id: The session's UUID
             include_messages: Whether to eager load messages
@@ -120,13 +228,17 @@ class SessionManager:
         Raises:
             SessionNotFoundError: If session doesn't exist
         """
-        query = select(Session).where(Session.id == session_id)
-
         if include_messages:
-            query = query.options(selectinload(Session.messages))
-
-        result = await self.db.execute(query)
-        session = result.scalar_one_or_none()
+            stmt = lambda_stmt(
+                lambda: select(Session).options(selectinload(Session.messages))
+            )
+            stmt += lambda s: s.where(Session.id == session_id)
+            result = await self.db.execute(stmt)
+            session = result.scalar_one_or_none()
+        else:
+            session = await self.db.get(
+                Session, session_id, options=[raiseload("*")]
+            )
 
         if not session:
             raise SessionNotFoundError(f"Session not found: {session_id}")
@@ -142,9 +254,9 @@ class SessionManager:
         Returns:
             The Session or None if not found
         """
-        result = await self.db.execute(
-            select(Session).where(Session.claude_session_id == claude_session_id)
-        )
+        stmt = lambda_stmt(lambda: select(Session))
+        stmt += lambda s: s.where(Session.claude_session_id == claude_session_id)
+        result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
     async def list_sessions(
@@ -165,14 +277,17 @@ class SessionManager:
         Returns:
             List of sessions, ordered by updated_at descending
         """
-        query = select(Session).order_by(Session.updated_at.desc())
+        # Each filter combination compiles once and is then served from the
+        # statement cache; the values are bound parameters
+        query = lambda_stmt(lambda: select(Session).order_by(Session.updated_at.desc()))
 
         if project_id:
-            query = query.where(Session.project_id == project_id)
+            query += lambda s: s.where(Session.project_id == project_id)
         if status:
-            query = query.where(Session.status == status.value)
+            status_value = status.value
+            query += lambda s: s.where(Session.status == status_value)
 
-        query = query.limit(limit).offset(offset)
+        query += lambda s: s.limit(limit).offset(offset)
 
         result = await self.db.execute(query)
         return result.scalars().all()
@@ -200,14 +315,14 @@ class SessionManager:
             SessionStateError: If the transition is invalid
         """
         session = await self.get_session(session_id)
-        current_status = session.status_enum
+        current_status = session.status
 
         # Validate state transition
-        valid_targets = VALID_TRANSITIONS.get(current_status, set())
-        if new_status not in valid_targets:
+        valid_targets = _NEXT_STATUSES.get(current_status, frozenset())
+        if new_status.value not in valid_targets:
             raise SessionStateError(
-                f"Invalid state transition: {current_status.value} -> {new_status.value}. "
-                f"Valid transitions from {current_status.value}: {[s.value for s in valid_targets]}"
+                f"Invalid state transition: {current_status} -> {new_status.value}. "
+                f"Valid transitions from {current_status}: {sorted(valid_targets)}"
             )
 
         # Apply transition
@@ -225,10 +340,10 @@ class SessionManager:
             session.claude_session_id = claude_session_id
 
         # Clear pending approval when moving away from WAITING_APPROVAL
-        if current_status == SessionStatus.WAITING_APPROVAL:
+        if current_status == _WAITING_APPROVAL:
             session.pending_approval = None
 
-        await self.db.commit()
+        await self._commit()
         await self.db.refresh(session)
 
         return session
@@ -253,7 +368,7 @@ class SessionManager:
         """
         session = await self.get_session(session_id)
 
-        if session.status_enum != SessionStatus.RUNNING:
+        if session.status != _RUNNING:
             raise SessionStateError(
                 f"Can only set pending approval from RUNNING state, "
                 f"current state: {session.status}"
@@ -262,7 +377,7 @@ class SessionManager:
         session.pending_approval = dict(approval_data)
         session.set_status(SessionStatus.WAITING_APPROVAL)
 
-        await self.db.commit()
+        await self._commit()
         await self.db.refresh(session)
 
         return session
@@ -274,6 +389,7 @@ class SessionManager:
         content: str,
         message_type: str | None = None,
         extra: dict[str, Any] | None = None,
+        timestamp: datetime | None = None,
     ) -> Message:
         """Add a message to a session.
 
@@ -283,6 +399,7 @@ class SessionManager:
             content: Message content
             message_type: SDK message type for reconstruction
             extra: Additional metadata
+            timestamp: When the message was received (defaults to now)
 
         Returns:
             The created Message
@@ -290,8 +407,18 @@ class SessionManager:
         Raises:
             SessionNotFoundError: If session doesn't exist
         """
-        # Verify session exists
-        session = await self.get_session(session_id)
+        # Bump the session's counters in SQL (message_count + 1 is evaluated
+        # by the database, so concurrent writers can't lose an increment);
+        # no matching row means the session doesn't exist
+        values: dict[str, Any] = {"message_count": Session.message_count + 1}
+        # Update last_prompt if this is a user message
+        if role == "user":
+            values["last_prompt"] = content[:LAST_PROMPT_MAX_LENGTH]
+        result = await self.db.execute(
+            update(Session).where(Session.id == session_id).values(**values)
+        )
+        if result.rowcount == 0:
+            raise SessionNotFoundError(f"Session not found: {session_id}")
 
         message = Message(
             session_id=session_id,
@@ -300,20 +427,80 @@ class SessionManager:
             message_type=message_type,
             extra=extra,
         )
+        if timestamp is not None:
+            message.timestamp = timestamp
 
+        # Message's id and timestamp defaults are client-side too, so the
+        # object is complete after flush without a refresh
         self.db.add(message)
+        await self._commit()
 
-        # Update session message count
-        session.message_count += 1
+        return message
 
-        # Update last_prompt if this is a user message
-        if role == "user":
-            session.last_prompt = content[:LAST_PROMPT_MAX_LENGTH]
+    async def add_messages(
+        self,
+        session_id: str,
+        messages: Sequence[NewMessage],
+    ) -> Sequence[Message]:
+        """Add several messages to a session in one round-trip.
 
-        await self.db.commit()
-        await self.db.refresh(message)
+        The rows go out as a single INSERT ... RETURNING, and the session's
+        message_count / last_prompt are bumped by one UPDATE, instead of an
+        INSERT, UPDATE and commit per message as with add_message.
+        Timestamps are assigned a microsecond apart in list order, ending at
+        the current time, so get_messages returns them in the order given and
+        a message added afterwards still sorts after the whole batch.
 
-        return message
+        Args:
+            session_id: The session's UUID
+            messages: Messages to store, in order
+
+        Returns:
+            The created Messages, in the same order
+
+        Raises:
+            SessionNotFoundError: If session doesn't exist
+        """
+        # Verify session exists
+        await self.get_session(session_id)
+
+        if not messages:
+            return []
+
+        # Count back from now: stamping forward would date the batch in the
+        # future, ahead of the next add_message
+        now = utc_now()
+        last = len(messages) - 1
+        rows = [
+            {
+                "session_id": session_id,
+                "role": m["role"],
+                "content": m["content"],
+                "message_type": m.get("message_type"),
+                "extra": m.get("extra"),
+                "timestamp": now - timedelta(microseconds=last - i),
+            }
+            for i, m in enumerate(messages)
+        ]
+        result = await self.db.scalars(
+            insert(Message).returning(Message, sort_by_parameter_order=True),
+            rows,
+        )
+        created = result.all()
+
+        values: dict[str, Any] = {"message_count": Session.message_count + len(rows)}
+        # last_prompt tracks the latest user message, as in add_message
+        for m in reversed(messages):
+            if m["role"] == "user":
+                values["last_prompt"] = m["content"][:LAST_PROMPT_MAX_LENGTH]
+                break
+        await self.db.execute(
+            update(Session).where(Session.id == session_id).values(**values)
+        )
+
+        await self._commit()
+
+        return created
 
     async def get_messages(
         self,
@@ -337,16 +524,13 @@ class SessionManager:
         # Verify session exists
         await self.get_session(session_id)
 
-        query = (
-            select(Message)
-            .where(Message.session_id == session_id)
-            .order_by(Message.timestamp)
-        )
+        query = lambda_stmt(lambda: select(Message).order_by(Message.timestamp))
+        query += lambda s: s.where(Message.session_id == session_id)
 
         if since:
-            query = query.where(Message.timestamp > since)
+            query += lambda s: s.where(Message.timestamp > since)
         if limit:
-            query = query.limit(limit)
+            query += lambda s: s.limit(limit)
 
         result = await self.db.execute(query)
         return result.scalars().all()
@@ -371,7 +555,7 @@ class SessionManager:
         session = await self.get_session(session_id)
         session.total_cost_usd += cost_usd
 
-        await self.db.commit()
+        await self._commit()
         await self.db.refresh(session)
 
         return session
@@ -394,10 +578,11 @@ class SessionManager:
             SessionNotFoundError: If session doesn't exist
             SessionStateError: If not in RUNNING state
         """
-        if final_cost_usd:
-            await self.update_session_cost(session_id, final_cost_usd)
+        async with self.transaction():
+            if final_cost_usd:
+                await self.update_session_cost(session_id, final_cost_usd)
 
-        return await self.update_session_status(session_id, SessionStatus.COMPLETED)
+            return await self.update_session_status(session_id, SessionStatus.COMPLETED)
 
     async def fail_session(
         self,
@@ -510,6 +695,17 @@ class SessionManager:
 
         return messages, total
 
+    async def _ensure_project_exists(self, project_id: str) -> None:
+        """Raise ProjectNotFoundError unless the project exists.
+
+        A bare EXISTS: no Project row is fetched or put in the identity map.
+        """
+        found = await self.db.scalar(
+            select(exists().where(Project.id == project_id))
+        )
+        if not found:
+            raise ProjectNotFoundError(f"Project not found: {project_id}")
+
     async def delete_session(self, session_id: str) -> None:
         """Delete a session and all its messages.
 
@@ -528,4 +724,4 @@ class SessionManager:
 
         # Delete session
         await self.db.delete(session)
-        await self.db.commit()
+        await self._commit()
@@ -49,6 +49,15 @@ class MessageExtra(TypedDict, total=False):
     timing_ms: int  # How long the operation took
 
 
+class NewMessage(TypedDict, total=False):
+    """One message for SessionManager.add_messages."""
+
+    role: str  # Required: user, assistant, system, tool_use, tool_result
+    content: str  # Required: message text (or JSON string for tool use/result)
+    message_type: str | None  # Optional: SDK message type for reconstruction
+    extra: MessageExtra | dict[str, Any] | None  # Optional: additional metadata
+
+
 class AgentMessage(TypedDict, total=False):
     """Unified message format from AgentRuntime for streaming.
 
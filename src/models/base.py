@@ -15,6 +15,7 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from src.config import get_settings
+from src.utils import fast_json
 
 
 # Naming convention for constraints (helps with migrations)
@@ -53,6 +54,16 @@ def generate_uuid() -> str:
     return str(uuid.uuid4())
 
 
+def json_serializer(obj) -> str:
+    """Encode JSON column values (pending_approval, extra, ...) via fast_json."""
+    return fast_json.dumps(obj).decode()
+
+
+def json_deserializer(data: str):
+    """Decode JSON column values via fast_json."""
+    return fast_json.loads(data)
+
+
 # Engine and session factory (lazy initialization)
 _engine = None
 _async_session_factory = None
@@ -73,6 +84,8 @@ def get_engine():
             echo=settings.debug,
             # SQLite-specific settings
             connect_args={"check_same_thread": False},
+            json_serializer=json_serializer,
+            json_deserializer=json_deserializer,
         )
     return _engine
 
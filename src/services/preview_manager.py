@@ -1,19 +1,25 @@
 """Preview Manager — manages dev server subprocesses for project live previews."""
 
 import asyncio
-import json
+import errno
+import functools
+import http.client
 import logging
+import math
 import os
+import select
 import shlex
+import shutil
 import signal
 import socket
 import subprocess
 import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime
 from pathlib import Path
 
 from src.models.project import Project
+from src.utils import fast_json
 from src.utils.project_detector import detect_project_type, PORT_FLAG_MAP
 
 logger = logging.getLogger(__name__)
@@ -22,15 +28,25 @@ logger = logging.getLogger(__name__)
 STARTUP_GRACE_SECONDS = 1.5
 # Max stderr lines to capture from a crashed process
 MAX_STDERR_LINES = 30
-
-
-@dataclass
+# Connect timeout for loopback port probes
+PORT_PROBE_TIMEOUT = 0.05
+# Non-blocking connect results that mean "handshake still in flight"
+_CONNECT_PENDING = frozenset({errno.EINPROGRESS, errno.EALREADY, errno.EWOULDBLOCK})
+# How long a resolved (tailscale_ip, lan_ip) pair is reused for URLs
+NET_IDENTITY_TTL_SECONDS = 30.0
+# tailscaled's LocalAPI socket (Linux and open-source macOS daemon)
+TAILSCALE_SOCKET = "/var/run/tailscale/tailscaled.sock"
+# Keys every PID file must carry to be recovered
+_PID_FILE_KEYS = frozenset({"pid", "port", "project_path"})
+
+
+@dataclass(slots=True)
 class ProcessInfo:
     pid: int
     port: int
     project_id: str
     project_path: str
-    started_at: datetime
+    started_at_ns: int  # wall clock, time.time_ns()
     process: subprocess.Popen | None
 
 
@@ -54,6 +70,8 @@ class PreviewManager:
         self._processes: dict[str, ProcessInfo] = {}
         self._tailscale_ip: str | None = None
         self._tailscale_checked: bool = False
+        # (tailscale_ip, lan_ip, monotonic fetch time)
+        self._net_identity: tuple[str | None, str | None, float] = (None, None, -math.inf)
         self.PID_DIR.mkdir(parents=True, exist_ok=True)
 
     def _log_path(self, project_id: str) -> Path:
@@ -90,7 +108,7 @@ class PreviewManager:
                     error="Preview already running for this project",
                 )
 
-        _, _, project_type = detect_project_type(project.path)
+        project_type = detect_project_type(project.path)[2]
 
         # Find a free port — start from the preferred port, scan upward
         actual_port = self._find_free_port(project.dev_port)
@@ -107,7 +125,7 @@ class PreviewManager:
             if port_changed:
                 env["PORT"] = str(actual_port)
 
-        args = shlex.split(cmd)
+        args = _split_command(cmd)
 
         # Redirect stderr to a log file so we can diagnose crashes
         log_file = self._log_path(project.id)
@@ -117,7 +135,9 @@ class PreviewManager:
             stderr_fh = subprocess.DEVNULL
 
         try:
-            proc = subprocess.Popen(
+            # fork/exec can stall for tens of ms, so keep it off the event loop
+            proc = await asyncio.to_thread(
+                subprocess.Popen,
                 args,
                 cwd=project.path,
                 stdout=subprocess.DEVNULL,
@@ -152,13 +172,12 @@ class PreviewManager:
             )
             return PreviewStatus(running=False, port=actual_port, error=error_msg)
 
-        now = datetime.now(timezone.utc)
         info = ProcessInfo(
             pid=proc.pid,
             port=actual_port,
             project_id=project.id,
             project_path=project.path,
-            started_at=now,
+            started_at_ns=time.time_ns(),
             process=proc,
         )
         self._processes[project.id] = info
@@ -206,7 +225,7 @@ class PreviewManager:
                     )
             return PreviewStatus(running=False)
 
-        _, _, project_type = detect_project_type(info.project_path)
+        project_type = detect_project_type(info.project_path)[2]
 
         return PreviewStatus(
             running=True,
@@ -218,9 +237,12 @@ class PreviewManager:
         )
 
     def _find_free_port(self, preferred: int, max_attempts: int = 20) -> int:
-        """Find a free port starting from ``preferred``, scanning upward."""
-        for offset in range(max_attempts):
-            port = preferred + offset
+        """Find a free port starting from ``preferred``, scanning upward.
+
+        Probes run one at a time and stop at the first free port; a refused
+        localhost connect returns immediately, so a pool wouldn't save time.
+        """
+        for port in range(preferred, preferred + max_attempts):
             if not self.detect_running(port):
                 return port
         # Fallback: let the OS pick one
@@ -259,8 +281,22 @@ class PreviewManager:
         return (cmd, env)
 
     def detect_running(self, port: int) -> bool:
+        """Check whether something is listening on ``port`` on loopback.
+
+        Uses a non-blocking connect: a closed loopback port is refused
+        as soon as the kernel processes the SYN, so the probe only ever
+        waits the full PORT_PROBE_TIMEOUT on a filtered port.
+        """
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            return sock.connect_ex(("127.0.0.1", port)) == 0
+            sock.setblocking(False)
+            err = sock.connect_ex(("127.0.0.1", port))
+            if err in _CONNECT_PENDING:
+                poller = select.poll()
+                poller.register(sock, select.POLLOUT)
+                if not poller.poll(PORT_PROBE_TIMEOUT * 1000):
+                    return False
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            return err == 0
 
     async def cleanup_all(self) -> None:
         for project_id, info in list(self._processes.items()):
@@ -270,34 +306,53 @@ class PreviewManager:
         self._processes.clear()
 
     def _recover_orphans(self) -> None:
-        if not self.PID_DIR.exists():
+        try:
+            with os.scandir(self.PID_DIR) as it:
+                entries = [e for e in it if e.name.endswith(".pid") and e.is_file()]
+        except FileNotFoundError:
             return
 
-        for pid_file in self.PID_DIR.glob("*.pid"):
+        live_pids = self._live_pids() if entries else None
+
+        for entry in entries:
+            pid_file = Path(entry.path)
             project_id = pid_file.stem
             try:
-                data = json.loads(pid_file.read_text(encoding="utf-8"))
+                if entry.stat().st_size == 0:
+                    raise ValueError("empty file")
+                with open(entry.path, "rb") as fh:
+                    data = fast_json.loads(fh.read())
+                if not isinstance(data, dict) or not _PID_FILE_KEYS <= data.keys():
+                    raise KeyError("missing required keys")
                 pid = data["pid"]
                 port = data["port"]
                 project_path = data["project_path"]
-                started_at_str = data["started_at"]
-            except (json.JSONDecodeError, KeyError, OSError) as e:
+                started_at_ns = _pid_file_started_at_ns(data)
+            except (ValueError, KeyError, TypeError, OSError) as e:
                 logger.warning("Invalid PID file %s: %s", pid_file, e)
                 pid_file.unlink(missing_ok=True)
                 continue
 
-            if not self._pid_exists(pid):
+            alive = pid in live_pids if live_pids is not None else self._pid_exists(pid)
+            if not alive:
                 logger.info("Orphaned PID file %s (pid %d dead), removing", pid_file, pid)
                 pid_file.unlink(missing_ok=True)
                 continue
 
-            started_at = datetime.fromisoformat(started_at_str)
+            if live_pids is not None and not self._pid_matches(pid, project_path):
+                logger.info(
+                    "Orphaned PID file %s (pid %d reused by another process), removing",
+                    pid_file, pid,
+                )
+                pid_file.unlink(missing_ok=True)
+                continue
+
             info = ProcessInfo(
                 pid=pid,
                 port=port,
                 project_id=project_id,
                 project_path=project_path,
-                started_at=started_at,
+                started_at_ns=started_at_ns,
                 process=None,
             )
             self._processes[project_id] = info
@@ -308,6 +363,18 @@ class PreviewManager:
             return self._tailscale_ip
 
         self._tailscale_checked = True
+
+        # Ask tailscaled directly — no fork needed when the socket exists
+        status = _query_tailscale_localapi(TAILSCALE_SOCKET)
+        if status is not None:
+            ips = (status.get("Self") or {}).get("TailscaleIPs") or []
+            self._tailscale_ip = next((ip for ip in ips if "." in ip), None)
+            return self._tailscale_ip
+
+        # CLI not installed — skip spawning a process that can't exist
+        if shutil.which("tailscale") is None:
+            return None
+
         try:
             result = subprocess.run(
                 ["tailscale", "ip", "-4"],
@@ -332,12 +399,25 @@ class PreviewManager:
         except OSError:
             return None
 
+    def _net_identity_cached(self) -> tuple[str | None, str | None, float]:
+        """Return the (tailscale_ip, lan_ip, fetched_at) snapshot.
+
+        Status endpoints are polled by the UI, so the addresses used to
+        build URLs are re-resolved at most every NET_IDENTITY_TTL_SECONDS.
+        The LAN address is only looked up when there's no Tailscale IP.
+        """
+        now = time.monotonic()
+        if now - self._net_identity[2] > NET_IDENTITY_TTL_SECONDS:
+            ts_ip = self._get_tailscale_ip()
+            lan_ip = None if ts_ip else self._get_lan_ip()
+            self._net_identity = (ts_ip, lan_ip, now)
+        return self._net_identity
+
     def _build_url(self, port: int) -> str:
-        ts_ip = self._get_tailscale_ip()
+        ts_ip, lan_ip, _ = self._net_identity_cached()
         if ts_ip:
             return f"http://{ts_ip}:{port}"
 
-        lan_ip = self._get_lan_ip()
         if lan_ip:
             return f"http://{lan_ip}:{port}"
 
@@ -350,9 +430,9 @@ class PreviewManager:
             "port": info.port,
             "project_id": info.project_id,
             "project_path": info.project_path,
-            "started_at": info.started_at.isoformat(),
+            "started_at_ns": info.started_at_ns,
         }
-        pid_file.write_text(json.dumps(data), encoding="utf-8")
+        _atomic_write(pid_file, fast_json.dumps(data))
 
     def _remove_pid_file(self, project_id: str) -> None:
         pid_file = self.PID_DIR / f"{project_id}.pid"
@@ -371,6 +451,32 @@ class PreviewManager:
         except (OSError, ProcessLookupError):
             return False
 
+    @staticmethod
+    def _live_pids() -> set[int] | None:
+        """Snapshot all live PIDs from /proc in one directory read.
+
+        Returns None where /proc isn't available (macOS) so callers
+        fall back to per-PID _pid_exists checks.
+        """
+        try:
+            return {int(name) for name in os.listdir("/proc") if name.isdigit()}
+        except OSError:
+            return None
+
+    @staticmethod
+    def _pid_matches(pid: int, project_path: str) -> bool:
+        """Check (via /proc) that pid is still running in project_path.
+
+        Dev servers are spawned with cwd=project_path, so a live PID whose
+        working directory differs has been reused by an unrelated process.
+        Only meaningful where /proc exists — callers check that first.
+        """
+        try:
+            cwd = os.readlink(f"/proc/{pid}/cwd")
+        except OSError:
+            return False
+        return cwd == os.path.realpath(project_path)
+
     @staticmethod
     def _kill_process(info: ProcessInfo) -> None:
         try:
@@ -397,8 +503,80 @@ class PreviewManager:
 
     @staticmethod
     def _uptime(info: ProcessInfo) -> int:
-        delta = datetime.now(timezone.utc) - info.started_at
-        return int(delta.total_seconds())
+        return (time.time_ns() - info.started_at_ns) // 1_000_000_000
+
+
+@functools.lru_cache(maxsize=256)
+def _split_command_cached(cmd: str) -> tuple[str, ...]:
+    return tuple(shlex.split(cmd))
+
+
+def _split_command(cmd: str) -> list[str]:
+    """shlex.split a dev command, memoized since it rarely changes per project."""
+    return list(_split_command_cached(cmd))
+
+
+def _pid_file_started_at_ns(data: dict) -> int:
+    """Read the start time from a PID file, accepting the legacy ISO key."""
+    if "started_at_ns" in data:
+        return int(data["started_at_ns"])
+    if "started_at" in data:
+        started_at = datetime.fromisoformat(data["started_at"])
+        return int(started_at.timestamp() * 1_000_000_000)
+    raise KeyError("started_at_ns")
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    """Write payload to path via a temp file and rename.
+
+    Readers (orphan recovery) never observe a half-written file. No
+    fsync — PID files are regenerable, so durability isn't worth it.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that talks to a UNIX domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("local-tailscaled.sock", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self._socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def _query_tailscale_localapi(socket_path: str) -> dict | None:
+    """Fetch tailscaled's status via its LocalAPI socket, or None."""
+    if not os.path.exists(socket_path):
+        return None
+    conn = _UnixHTTPConnection(socket_path, timeout=1)
+    try:
+        conn.request("GET", "/localapi/v0/status")
+        resp = conn.getresponse()
+        if resp.status != 200:
+            return None
+        data = fast_json.loads(resp.read())
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
 
 
 _preview_manager: PreviewManager | None = None
@@ -146,7 +146,7 @@ def generate_edit_diff(
 
 def generate_write_diff(
     file_path: str,
-    content: str,
+    content: str | bytes,
 ) -> DiffResult:
     """Generate a diff for a Write tool operation.
 
@@ -155,11 +155,18 @@ def generate_write_diff(
 
     Args:
         file_path: Path to the file being written
-        content: The file content being written
+        content: The file content being written. Raw bytes are checked
+            for binary content before decoding, so large binary payloads
+            are never decoded.
 
     Returns:
         DiffResult with diff, stats, and risk level
     """
+    if isinstance(content, bytes):
+        if _is_binary_bytes(content):
+            return _binary_result(os.path.basename(file_path), len(content), "low")
+        content = content.decode(errors="replace")
+
     if _is_binary(content):
         size = len(content.encode(errors="replace"))
         return _binary_result(os.path.basename(file_path), size, "low")
@@ -372,7 +379,7 @@ def _finalize_diff(
         )
 
     full_text = "".join(diff_lines)
-    total_bytes = len(full_text.encode())
+    total_bytes = _utf8_len(full_text)
     total_lines = full_text.count("\n")
     stats = _compute_stats(diff_lines)
 
@@ -444,11 +451,28 @@ def _binary_result(
     )
 
 
+def _utf8_len(text: str) -> int:
+    """Return the UTF-8 encoded length of text.
+
+    ASCII text (the common case for source diffs) has one byte per
+    character, so the encode — a full copy of a possibly multi-MB
+    diff — is only paid for non-ASCII content.
+    """
+    if text.isascii():
+        return len(text)
+    return len(text.encode())
+
+
 def _is_binary(content: str) -> bool:
     """Check if content is binary by looking for null bytes in the first 8KB."""
     return "\x00" in content[:_BINARY_CHECK_SIZE]
 
 
+def _is_binary_bytes(data: bytes) -> bool:
+    """Check raw bytes for null bytes in the first 8KB without decoding."""
+    return data.find(b"\x00", 0, _BINARY_CHECK_SIZE) != -1
+
+
 def _format_bytes(size: int) -> str:
     """Format byte size for human display."""
     if size < 1024:
@@ -1,8 +1,10 @@
 """Project type detection for live preview dev server commands."""
 
+import codecs
+import functools
 import json
 import logging
-from pathlib import Path
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,45 @@ def _has_host_binding(script: str) -> bool:
     return "--host" in script or "-H " in script or "0.0.0.0" in script
 
 
+# Files whose presence drives detection; everything else in the directory is ignored.
+_MARKER_FILES = frozenset({"package.json", "app.py", "wsgi.py", "manage.py"})
+
+# Byte substrings that must appear somewhere in package.json for any of the
+# npm branches in detect_project_type to match. Files without one of them
+# can't yield an npm dev command, so they're never handed to json.loads.
+_NPM_MARKERS: tuple[bytes, ...] = (b"vite", b"next", b"react-scripts", b"nuxt", b'"dev"')
+
+
+@functools.lru_cache(maxsize=512)
+def _load_package_json(path: str, mtime_ns: int, size: int) -> dict | None:
+    """Parse package.json, memoized on its (path, mtime_ns, size) stat key.
+
+    Any edit to the file changes the key, so stale entries are never served.
+    Unreadable or malformed files cache as None so repeated polls of a broken
+    project don't re-parse it either. Content that doesn't start with '{' is
+    rejected as None, and an object mentioning none of _NPM_MARKERS is
+    returned as {}, both without parsing.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        # Anything that doesn't open with an object can't be a package.json;
+        # reject it without entering the parser.
+        if not raw.removeprefix(codecs.BOM_UTF8).lstrip().startswith(b"{"):
+            return None
+        if not any(marker in raw for marker in _NPM_MARKERS):
+            return {}
+        data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def clear_package_json_cache() -> None:
+    """Forget every cached package.json parse."""
+    _load_package_json.cache_clear()
+
+
 def detect_project_type(project_path: str) -> tuple[str | None, int | None, str | None]:
     """Detect the project type and appropriate dev server command.
 
@@ -34,13 +75,29 @@ def detect_project_type(project_path: str) -> tuple[str | None, int | None, str
     Returns:
         (dev_command, dev_port, project_type) or (None, None, None)
     """
-    root = Path(project_path)
-    package_json = root / "package.json"
-
-    if package_json.is_file():
+    # One readdir instead of a stat() per marker file.
+    try:
+        with os.scandir(project_path) as it:
+            files = {
+                entry.name: entry
+                for entry in it
+                if entry.name in _MARKER_FILES and entry.is_file()
+            }
+    except OSError:
+        return (None, None, None)
+
+    package_json = files.get("package.json")
+    if package_json is not None:
         try:
-            data = json.loads(package_json.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
+            st = package_json.stat()
+        except OSError:
+            st = None
+        data = (
+            _load_package_json(package_json.path, st.st_mtime_ns, st.st_size)
+            if st is not None
+            else None
+        )
+        if data is None:
             logger.warning("Failed to parse package.json at %s", project_path)
             return (None, None, None)
 
@@ -69,10 +126,11 @@ def detect_project_type(project_path: str) -> tuple[str | None, int | None, str
         if dev_script:
             return ("npm run dev", 3000, "node")
 
-    if (root / "app.py").is_file() or (root / "wsgi.py").is_file():
+    if "app.py" in files or "wsgi.py" in files:
         return ("flask run --host 0.0.0.0", 5000, "flask")
 
-    if (root / "manage.py").is_file():
+    if "manage.py" in files:
         return ("python manage.py runserver 0.0.0.0:8001", 8001, "django")
 
     return (None, None, None)
+
@@ -8,13 +8,22 @@ This module scans those files to surface sessions started outside of ZURK
 (e.g., from VS Code or the CLI).
 """
 
-import json
+import functools
 import logging
+import mmap
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
+from src.utils import fast_json
+
 logger = logging.getLogger(__name__)
 
 # Claude Code stores sessions under this base directory
@@ -26,12 +35,27 @@ TAIL_READ_BYTES = 8192
 # Max JSONL files to scan per project (safety limit)
 MAX_FILES_PER_PROJECT = 100
 
+# How many parsed session files to remember between discover_sessions calls
+SESSION_CACHE_SIZE = 1024
+
+# Transcripts modified within this many seconds may still be written to by
+# Claude Code, so they're read into memory instead of memory-mapped
+LIVE_SESSION_SECONDS = 60
+
 # How many JSONL lines to scan for metadata fields (slug, cwd, gitBranch)
 # These fields may not appear on line 1 when the first entry is a file-history-snapshot
 METADATA_SCAN_LINES = 10
 
+# How many JSONL lines to scan for the first user message (session title)
+TITLE_SCAN_LINES = 50
+
+# Past this many lines, stop scanning as soon as any metadata field has been
+# found; the remaining lines up to METADATA_SCAN_LINES are only read when the
+# early entries carried nothing at all
+METADATA_EARLY_EXIT_LINES = 5
 
-@dataclass
+
+@dataclass(slots=True)
 class ExternalSession:
     """Metadata extracted from a Claude Code JSONL session file."""
 
@@ -53,10 +77,27 @@ class ExternalSession:
     extra: dict = field(default_factory=dict)
 
 
+# file path -> (st_mtime_ns, st_size, parsed session or None), oldest first.
+# Transcripts are append-only, so an unchanged (mtime, size) means an
+# unchanged file and the previous parse can be returned as-is.
+_session_cache: "OrderedDict[str, tuple[int, int, ExternalSession | None]]" = OrderedDict()
+_session_cache_lock = threading.Lock()
+
+
+def clear_session_cache() -> None:
+    """Forget every cached discover_session result."""
+    with _session_cache_lock:
+        _session_cache.clear()
+
+
+@functools.lru_cache(maxsize=4096)
 def encode_project_path(project_path: str) -> str:
     """Convert an absolute path to Claude Code's encoded directory name.
 
     '/Users/mike/Documents/zuck' → '-Users-mike-Documents-zuck'
+
+    Pure string work (normpath doesn't touch the filesystem or CWD), so
+    results are memoized for the handful of project paths polled repeatedly.
     """
     # Normalize: resolve symlinks, remove trailing slashes
     normalized = os.path.normpath(project_path)
@@ -64,47 +105,179 @@ def encode_project_path(project_path: str) -> str:
     return normalized.replace("/", "-")
 
 
-def _parse_first_line(line: str) -> dict:
-    """Parse the first JSONL entry for session metadata."""
-    try:
-        return json.loads(line)
-    except (json.JSONDecodeError, ValueError):
-        return {}
+# A session transcript handed to the scanning helpers: either a path to open,
+# or the bytes of an already-read / memory-mapped file
+JsonlSource = Path | bytes | mmap.mmap
 
 
-def _parse_last_lines(data: bytes) -> dict:
-    """Parse the last complete JSONL entry from a tail read."""
+def _iter_buffer_lines(buf: bytes | mmap.mmap) -> Iterator[bytes]:
+    """Yield newline-terminated lines from an in-memory buffer.
+
+    Slices by offset, so an mmap's own file position is left untouched and
+    several helpers can walk the same mapping.
+    """
+    pos, end = 0, len(buf)
+    while pos < end:
+        nl = buf.find(b"\n", pos)
+        stop = end if nl == -1 else nl + 1
+        yield buf[pos:stop]
+        pos = stop
+
+
+def _iter_marked_lines(
+    buf: bytes | mmap.mmap, markers: tuple[bytes, ...]
+) -> Iterator[bytes]:
+    """Yield, in file order, only the lines of buf that contain one of markers.
+
+    Jumps between marker hits with buf.find/rfind (C-level searches) instead
+    of visiting every line from Python, so long runs of unrelated entries
+    cost nothing per line. Each marker's next hit is remembered (-1 once it
+    has none left), and only markers whose hit fell inside the line just
+    yielded are searched again, so a marker that stops appearing isn't
+    rescanned to the end of buf on every step.
+    """
+    end = len(buf)
+    next_hits = [buf.find(m) for m in markers]
+    while True:
+        live = [h for h in next_hits if h != -1]
+        if not live:
+            return
+        hit = min(live)
+        start = buf.rfind(b"\n", 0, hit) + 1
+        nl = buf.find(b"\n", hit)
+        stop = end if nl == -1 else nl + 1
+        yield buf[start:stop]
+        for i, h in enumerate(next_hits):
+            if h != -1 and h < stop:
+                next_hits[i] = buf.find(markers[i], stop)
+
+
+@contextmanager
+def _jsonl_lines(
+    source: JsonlSource, markers: tuple[bytes, ...] | None = None
+) -> Iterator[Iterable[bytes]]:
+    """Iterate the raw lines of a transcript given as a path or a buffer.
+
+    With markers, a buffer yields only the lines containing one of them
+    (see _iter_marked_lines); a file still yields every line, so callers
+    keep their own marker check.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+    elif markers:
+        yield _iter_marked_lines(source, markers)
+    else:
+        yield _iter_buffer_lines(source)
+
+
+def _loads_entry(line: bytes) -> dict:
+    """Parse one JSONL line into a dict, or {} if it isn't a JSON object.
+
+    Invalid UTF-8 makes the bytes parser reject the whole line, so retry on
+    the decoded text with bad bytes replaced rather than losing the entry.
+    """
     try:
-        text = data.decode("utf-8", errors="replace")
-        # Split by newline, filter empties, take last non-empty line
-        lines = [l for l in text.strip().split("\n") if l.strip()]
-        if not lines:
+        entry = fast_json.loads(line)
+    except ValueError:
+        try:
+            entry = fast_json.loads(line.decode("utf-8", errors="replace"))
+        except ValueError:
             return {}
-        return json.loads(lines[-1])
-    except (json.JSONDecodeError, ValueError):
+    return entry if isinstance(entry, dict) else {}
+
+
+def _parse_first_line(line: bytes) -> dict:
+    """Parse the first JSONL entry for session metadata."""
+    return _loads_entry(line)
+
+
+def _parse_last_lines(data: bytes) -> dict:
+    """Parse the last complete JSONL entry from a tail read.
+
+    Only the final non-blank line is isolated (one rfind back from the end)
+    and parsed; the rest of the tail chunk is never decoded or split.
+    """
+    data = data.rstrip()
+    if not data:
         return {}
+    return _loads_entry(data[data.rfind(b"\n") + 1:])
+
+
+# Entry type markers as they appear in a compact or space-separated JSONL line
+_USER_MARKERS = (b'"type":"user"', b'"type": "user"')
+_ASSISTANT_MARKERS = (b'"type":"assistant"', b'"type": "assistant"')
 
+# Two user/assistant markers on one line (a progress entry embedding a
+# message, say) — whole-buffer occurrence counts would overcount that line
+_MULTI_MARKER_LINE = re.compile(
+    rb'"type": ?"(?:user|assistant)"[^\n]*"type": ?"(?:user|assistant)"'
+)
 
-def _count_entries(file_path: Path) -> tuple[int, int, int]:
+# A whitespace-only line, which the per-line count skips
+_BLANK_LINE = re.compile(rb"(?m)^[ \t\r\f\v]*(?:\n|\Z)")
+
+
+def _count_occurrences(data: bytes | mmap.mmap, needle: bytes) -> int:
+    """Count non-overlapping occurrences of needle without copying data.
+
+    bytes has a C-level count; an mmap doesn't, so it's walked with find,
+    which searches the mapping in place.
+    """
+    if isinstance(data, bytes):
+        return data.count(needle)
+    count = 0
+    pos = data.find(needle)
+    while pos != -1:
+        count += 1
+        pos = data.find(needle, pos + len(needle))
+    return count
+
+
+def _count_entries_bulk(data: bytes | mmap.mmap) -> tuple[int, int, int] | None:
+    """Count entries with C-level searches over the whole buffer.
+
+    Exact only when every line carries at most one type marker and no line
+    is blank; returns None otherwise so the caller can count line by line.
+    """
+    ends_with_newline = data[-1:] == b"\n"
+    # A trailing newline doesn't start another line
+    if _BLANK_LINE.search(data, 0, len(data) - ends_with_newline):
+        return None
+    if _MULTI_MARKER_LINE.search(data):
+        return None
+    total = _count_occurrences(data, b"\n") + (not ends_with_newline)
+    user_count = sum(_count_occurrences(data, m) for m in _USER_MARKERS)
+    assistant_count = sum(_count_occurrences(data, m) for m in _ASSISTANT_MARKERS)
+    return total, user_count, assistant_count
+
+
+def _count_entries(source: JsonlSource) -> tuple[int, int, int]:
     """Count total entries, user messages, and assistant messages.
 
-    Uses a streaming approach to avoid loading the full file into memory.
+    In-memory buffers are counted in bulk when that's unambiguous; paths
+    (and ambiguous buffers) are streamed line by line.
     Returns (total, user_count, assistant_count).
     """
+    if not isinstance(source, (str, os.PathLike)) and len(source):
+        counts = _count_entries_bulk(source)
+        if counts is not None:
+            return counts
+
     total = 0
     user_count = 0
     assistant_count = 0
 
     try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
+        with _jsonl_lines(source) as lines:
+            for line in lines:
                 if not line.strip():
                     continue
                 total += 1
                 # Quick check without full JSON parse
-                if '"type":"user"' in line or '"type": "user"' in line:
+                if b'"type":"user"' in line or b'"type": "user"' in line:
                     user_count += 1
-                elif '"type":"assistant"' in line or '"type": "assistant"' in line:
+                elif b'"type":"assistant"' in line or b'"type": "assistant"' in line:
                     assistant_count += 1
     except OSError:
         pass
@@ -112,58 +285,161 @@ def _count_entries(file_path: Path) -> tuple[int, int, int]:
     return total, user_count, assistant_count
 
 
-def _find_model(file_path: Path) -> str | None:
+def _find_model(source: JsonlSource) -> str | None:
     """Find the model name from the first assistant entry.
 
-    Scans line by line until we find an assistant message with a model field.
+    Scans until we find an assistant message with a model field.
     """
     try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                if '"type":"assistant"' not in line and '"type": "assistant"' not in line:
+        with _jsonl_lines(source, _ASSISTANT_MARKERS) as lines:
+            for line in lines:
+                if b'"type":"assistant"' not in line and b'"type": "assistant"' not in line:
                     continue
                 try:
-                    entry = json.loads(line)
+                    entry = fast_json.loads(line)
                     model = entry.get("message", {}).get("model")
                     if model:
                         return model
-                except (json.JSONDecodeError, ValueError):
+                except (fast_json.JSONDecodeError, ValueError, AttributeError):
                     continue
     except OSError:
         pass
     return None
 
 
-def _parse_metadata_fields(file_path: Path) -> dict:
+def _metadata_pattern(key: str) -> "re.Pattern[bytes]":
+    """Match a ``"key": "<string>"`` pair, capturing the raw string body."""
+    return re.compile(rb'"' + key.encode() + rb'"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+# Raw-byte extractors for the metadata fields, so early JSONL lines (which can
+# carry large tool payloads) don't have to be fully parsed just to read them
+_METADATA_PATTERNS = {
+    key: _metadata_pattern(key) for key in ("slug", "cwd", "gitBranch")
+}
+_METADATA_KEYS = frozenset(_METADATA_PATTERNS)
+
+
+def _decode_json_string(raw: bytes) -> str:
+    """Decode the body of a JSON string literal captured from raw bytes."""
+    if b"\\" not in raw:
+        return raw.decode("utf-8", errors="replace")
+    return fast_json.loads(b'"' + raw + b'"')
+
+
+def _metadata_scan_done(line_no: int, result: dict) -> bool:
+    """Whether the metadata scan should stop before reading line line_no."""
+    if line_no >= METADATA_SCAN_LINES:
+        return True
+    if not result:
+        return False
+    return line_no >= METADATA_EARLY_EXIT_LINES or _METADATA_KEYS <= result.keys()
+
+
+def _collect_metadata(line: bytes, result: dict) -> None:
+    """Add any slug/cwd/gitBranch found on one raw JSONL line to result.
+
+    Values are pulled out of the raw line with _METADATA_PATTERNS. A match is
+    only trusted when no nested object opens before it (so it's a top-level
+    key); otherwise the line falls back to a full JSON parse. Keys already in
+    result are kept — the first value wins.
+    """
+    start = line.find(b"{")
+    if start == -1 or line[:start].strip():
+        return
+
+    needs_parse = False
+    for key, pattern in _METADATA_PATTERNS.items():
+        if key in result:
+            continue
+        match = pattern.search(line, start)
+        if match is None:
+            continue
+        if line.find(b"{", start + 1, match.start()) != -1:
+            needs_parse = True
+            break
+        try:
+            result[key] = _decode_json_string(match.group(1))
+        except (fast_json.JSONDecodeError, ValueError):
+            needs_parse = True
+            break
+
+    if needs_parse:
+        try:
+            entry = fast_json.loads(line)
+        except (fast_json.JSONDecodeError, ValueError):
+            return
+        if not isinstance(entry, dict):
+            return
+        # One C-level set intersection instead of a lookup per key
+        for key in _METADATA_KEYS & entry.keys():
+            result.setdefault(key, entry[key])
+
+
+def _parse_metadata_fields(source: JsonlSource) -> dict:
     """Scan the first METADATA_SCAN_LINES lines for slug, cwd, and gitBranch.
 
     These fields can appear on any early JSONL line — not necessarily line 1.
+    Stops once all three are found, or after METADATA_EARLY_EXIT_LINES lines
+    if at least one is.
     Returns a dict with keys 'slug', 'cwd', 'gitBranch' (present only if found).
     """
     result: dict = {}
-    target_keys = {"slug", "cwd", "gitBranch"}
     try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            for i, line in enumerate(f):
-                if i >= METADATA_SCAN_LINES:
+        with _jsonl_lines(source) as lines:
+            for i, line in enumerate(lines):
+                if _metadata_scan_done(i, result):
                     break
-                if not line.strip():
-                    continue
-                try:
-                    entry = json.loads(line)
-                except (json.JSONDecodeError, ValueError):
-                    continue
-                for key in target_keys:
-                    if key not in result and key in entry:
-                        result[key] = entry[key]
-                if target_keys <= result.keys():
-                    break  # Found all target keys
+                _collect_metadata(line, result)
     except OSError:
         pass
     return result
 
 
-def _extract_first_user_message(file_path: Path, max_lines: int = 50) -> str | None:
+def _user_message_text(line: bytes) -> str | None:
+    """Return the text of a raw JSONL line if it's a user entry with content.
+
+    Handles message.content as a plain string or as a list of content blocks
+    (first non-empty text block), plus the older plain-string message.
+    """
+    if b'"type":"user"' not in line and b'"type": "user"' not in line:
+        return None
+    try:
+        entry = fast_json.loads(line)
+    except (fast_json.JSONDecodeError, ValueError):
+        return None
+    try:
+        if entry["type"] != "user":
+            return None
+        msg = entry["message"]
+    except (KeyError, TypeError):
+        return None
+    # Older format: message is a plain string
+    if type(msg) is str:
+        return msg.strip() or None
+    try:
+        content = msg["content"]
+    except (KeyError, TypeError):
+        return None
+    # message.content can be a plain string…
+    if type(content) is str:
+        return content.strip() or None
+    # …or a list of content blocks (text, image, etc.)
+    if type(content) is list:
+        for block in content:
+            try:
+                if block["type"] == "text":
+                    text = block["text"].strip()
+                    if text:
+                        return text
+            except (KeyError, TypeError, AttributeError):
+                continue
+    return None
+
+
+def _extract_first_user_message(
+    source: JsonlSource, max_lines: int = TITLE_SCAN_LINES
+) -> str | None:
     """Extract the text of the first user message for use as a session title.
 
     Scans up to max_lines to find the first ``type: "user"`` entry and
@@ -171,100 +447,210 @@ def _extract_first_user_message(file_path: Path, max_lines: int = 50) -> str | N
     is a list).  Returns the raw text (callers truncate for display).
     """
     try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            for i, line in enumerate(f):
+        with _jsonl_lines(source) as lines:
+            for i, line in enumerate(lines):
                 if i >= max_lines:
                     break
-                if '"type":"user"' not in line and '"type": "user"' not in line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                except (json.JSONDecodeError, ValueError):
-                    continue
-                if entry.get("type") != "user":
-                    continue
-                msg = entry.get("message", {})
-                # message.content can be a plain string…
-                if isinstance(msg, dict):
-                    content = msg.get("content", "")
-                    if isinstance(content, str) and content.strip():
-                        return content.strip()
-                    # …or a list of content blocks (text, image, etc.)
-                    if isinstance(content, list):
-                        for block in content:
-                            if isinstance(block, dict) and block.get("type") == "text":
-                                text = block.get("text", "").strip()
-                                if text:
-                                    return text
-                # Older format: message is a plain string
-                if isinstance(msg, str) and msg.strip():
-                    return msg.strip()
+                text = _user_message_text(line)
+                if text:
+                    return text
     except OSError:
         pass
     return None
 
 
-def discover_session(file_path: Path) -> ExternalSession | None:
+def _dir_has_entries(path: str) -> bool:
+    """True if path is a directory with at least one entry.
+
+    One opendir/readdir — no separate is_dir() stat, and a missing path
+    fails fast with ENOENT.
+    """
+    try:
+        with os.scandir(path) as it:
+            return next(it, None) is not None
+    except OSError:
+        return False
+
+
+# Transcript filenames are "<session uuid>.jsonl"; when the stem has that
+# shape it is the session id and the first entry's sessionId isn't consulted
+_SESSION_ID_FILENAME = re.compile(r"[0-9a-f-]{36}")
+
+
+@dataclass(slots=True)
+class SessionScan:
+    """Everything discover_session reads out of one transcript buffer."""
+
+    first: dict
+    last: dict
+    metadata: dict
+    title: str | None
+    model: str | None
+    total_entries: int
+    user_messages: int
+    assistant_messages: int
+
+
+def _scan_session(buf: bytes | mmap.mmap) -> SessionScan | None:
+    """Collect a transcript's metadata in one walk over its head.
+
+    Metadata (first METADATA_SCAN_LINES lines) and the title (first
+    TITLE_SCAN_LINES lines) are gathered from the same pass instead of one
+    scan each. Counts and the model come from whole-buffer C-level searches
+    (_count_entries / _find_model), which beat any per-line Python loop.
+    Returns None when the first line isn't a JSON object.
+    """
+    nl = buf.find(b"\n")
+    first = _parse_first_line(buf[: len(buf) if nl == -1 else nl])
+    if not first:
+        return None
+
+    metadata: dict = {}
+    title: str | None = None
+    metadata_done = False
+    for i, line in enumerate(_iter_buffer_lines(buf)):
+        metadata_done = metadata_done or _metadata_scan_done(i, metadata)
+        title_done = title is not None or i >= TITLE_SCAN_LINES
+        if metadata_done and title_done:
+            break
+        if not metadata_done:
+            _collect_metadata(line, metadata)
+        if not title_done:
+            title = _user_message_text(line)
+
+    total, user_count, assistant_count = _count_entries(buf)
+
+    return SessionScan(
+        first=first,
+        last=_parse_last_lines(buf[max(0, len(buf) - TAIL_READ_BYTES):]),
+        metadata=metadata,
+        title=title,
+        model=_find_model(buf),
+        total_entries=total,
+        user_messages=user_count,
+        assistant_messages=assistant_count,
+    )
+
+
+def discover_session_from_bytes(
+    buf: bytes | mmap.mmap, file_path: Path
+) -> ExternalSession | None:
+    """Extract session metadata from a transcript's contents already in memory.
+
+    Args:
+        buf: The full JSONL transcript (bytes or a memory map of the file).
+        file_path: Where the transcript lives; supplies the session id (the
+            filename stem), the reported file_path, and the location of the
+            subagents directory. It is not read.
+
+    Returns None if the buffer is empty or its first line isn't a JSON object.
+    """
+    if not buf:
+        return None
+    session_id = file_path.stem  # UUID from filename
+    scan = _scan_session(buf)
+    if scan is None:
+        return None
+
+    first, meta = scan.first, scan.metadata
+
+    # Check for subagent directories
+    path_str = str(file_path)
+    has_subagents = _dir_has_entries(
+        os.path.join(os.path.dirname(path_str), session_id, "subagents")
+    )
+
+    return ExternalSession(
+        session_id=(
+            session_id
+            if _SESSION_ID_FILENAME.fullmatch(session_id)
+            else first.get("sessionId", session_id)
+        ),
+        file_path=path_str,
+        file_size_bytes=len(buf),
+        slug=meta.get("slug") or first.get("slug"),
+        started_at=first.get("timestamp"),
+        ended_at=scan.last.get("timestamp"),
+        model=scan.model,
+        claude_code_version=first.get("version"),
+        total_entries=scan.total_entries,
+        user_messages=scan.user_messages,
+        assistant_messages=scan.assistant_messages,
+        has_subagents=has_subagents,
+        cwd=meta.get("cwd"),
+        git_branch=meta.get("gitBranch"),
+        title=scan.title,
+    )
+
+
+def _load_transcript(file_path: Path, stat: os.stat_result) -> bytes | mmap.mmap | None:
+    """Load the first stat.st_size bytes of a transcript for scanning.
+
+    Settled files are memory-mapped once, so every scan walks the same
+    page-cache-backed buffer instead of reopening and re-reading the file.
+    Touching a mapped page past a file's new end raises SIGBUS, which kills
+    the process, so transcripts modified within LIVE_SESSION_SECONDS (which
+    Claude Code may still be rewriting) are copied into memory instead.
+    A settled file truncated mid-scan would still fault; nothing in Claude
+    Code does that to a finished transcript.
+
+    Either way the buffer is sized from the given stat, so file_size_bytes
+    and the cache key describe exactly the bytes that were parsed. Returns
+    None if the file shrank below that size after the stat.
+    """
+    with open(file_path, "rb") as f:
+        if time.time() - stat.st_mtime < LIVE_SESSION_SECONDS:
+            data = f.read(stat.st_size)
+            return data if len(data) == stat.st_size else None
+        try:
+            # The mapping holds its own reference to the file, so it outlives f
+            return mmap.mmap(f.fileno(), stat.st_size, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+
+def discover_session(
+    file_path: Path, file_stat: os.stat_result | None = None
+) -> ExternalSession | None:
     """Extract metadata from a single JSONL session file.
 
+    Args:
+        file_path: Path to the session JSONL file.
+        file_stat: Stat result for file_path if the caller already has one
+            (e.g. from a directory scan); saves a stat() call.
+
+    Results are cached per file on (st_mtime_ns, st_size), so re-discovering
+    an untouched transcript skips all reading and parsing.
+
     Returns None if the file can't be parsed or is empty.
     """
     try:
-        stat = file_path.stat()
+        stat = file_stat if file_stat is not None else os.stat(file_path)
         if stat.st_size == 0:
             return None
 
-        session_id = file_path.stem  # UUID from filename
+        cache_key = str(file_path)
+        with _session_cache_lock:
+            cached = _session_cache.get(cache_key)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                _session_cache.move_to_end(cache_key)
+                return cached[2]
 
-        # Read first line for start metadata
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            first_line = f.readline()
-
-        first = _parse_first_line(first_line)
-        if not first:
+        buf = _load_transcript(file_path, stat)
+        if buf is None:
             return None
-
-        # Scan early lines for metadata (slug, cwd, gitBranch)
-        meta = _parse_metadata_fields(file_path)
-
-        # Read last entry for end timestamp
-        with open(file_path, "rb") as f:
-            # Seek to near end of file
-            seek_pos = max(0, stat.st_size - TAIL_READ_BYTES)
-            f.seek(seek_pos)
-            tail_data = f.read()
-        last = _parse_last_lines(tail_data)
-
-        # Count entries (streaming, memory-efficient)
-        total, user_count, assistant_count = _count_entries(file_path)
-
-        # Find model from first assistant message
-        model = _find_model(file_path)
-
-        # Extract first user message as title
-        title = _extract_first_user_message(file_path)
-
-        # Check for subagent directories
-        subagent_dir = file_path.parent / session_id / "subagents"
-        has_subagents = subagent_dir.is_dir() and any(subagent_dir.iterdir())
-
-        return ExternalSession(
-            session_id=first.get("sessionId", session_id),
-            file_path=str(file_path),
-            file_size_bytes=stat.st_size,
-            slug=meta.get("slug") or first.get("slug"),
-            started_at=first.get("timestamp"),
-            ended_at=last.get("timestamp"),
-            model=model,
-            claude_code_version=first.get("version"),
-            total_entries=total,
-            user_messages=user_count,
-            assistant_messages=assistant_count,
-            has_subagents=has_subagents,
-            cwd=meta.get("cwd"),
-            git_branch=meta.get("gitBranch"),
-            title=title,
-        )
+        try:
+            session = discover_session_from_bytes(buf, file_path)
+        finally:
+            if not isinstance(buf, bytes):
+                buf.close()
+
+        with _session_cache_lock:
+            _session_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, session)
+            _session_cache.move_to_end(cache_key)
+            while len(_session_cache) > SESSION_CACHE_SIZE:
+                _session_cache.popitem(last=False)
+        return session
 
     except OSError as e:
         logger.warning(f"Failed to read session file {file_path}: {e}")
@@ -283,24 +669,43 @@ def discover_sessions(project_path: str) -> list[ExternalSession]:
     encoded = encode_project_path(project_path)
     sessions_dir = CLAUDE_PROJECTS_DIR / encoded
 
-    if not sessions_dir.is_dir():
+    # One readdir pass answers both "does the dir exist" and "which files are
+    # transcripts" — no is_dir() probe and no glob + per-file Path.stat().
+    candidates: list[tuple[float, Path, os.stat_result]] = []
+    try:
+        with os.scandir(sessions_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".jsonl"):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                candidates.append((st.st_mtime, Path(entry.path), st))
+    except (FileNotFoundError, NotADirectoryError):
         logger.debug(f"No Claude sessions directory found at {sessions_dir}")
         return []
+    except OSError as e:
+        logger.warning(f"Failed to scan sessions directory {sessions_dir}: {e}")
+        return []
 
-    # Find all top-level JSONL files (session transcripts)
-    jsonl_files = sorted(
-        sessions_dir.glob("*.jsonl"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )[:MAX_FILES_PER_PROJECT]
+    # Top-level JSONL files (session transcripts), most recently modified first
+    candidates.sort(key=lambda c: c[0], reverse=True)
 
+    # Scanned one file after another: parsing holds the GIL (orjson, and the
+    # page faults on each mapped transcript), so a thread pool measured no
+    # faster here.
     sessions: list[ExternalSession] = []
-    for file_path in jsonl_files:
-        session = discover_session(file_path)
+    for _, file_path, st in candidates[:MAX_FILES_PER_PROJECT]:
+        session = discover_session(file_path, st)
         if session:
             sessions.append(session)
 
-    # Sort by started_at descending (newest first)
+    # Sort by started_at descending (newest first). Transcript timestamps are
+    # uniform UTC ISO-8601 strings ("...T10:00:00.000Z"), which order
+    # correctly as plain strings, so no datetime parsing happens here.
     sessions.sort(
         key=lambda s: s.started_at or "",
         reverse=True,
@@ -14,10 +14,14 @@ Everything else (``progress``, ``system``, ``file-history-snapshot``, ``result``
 is skipped.
 """
 
-import json
 import logging
+import os
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
+
+from src.utils import fast_json
 
 logger = logging.getLogger(__name__)
 
@@ -64,50 +68,74 @@ def read_session_messages(file_path: str | Path) -> tuple[SessionMeta, list[Pars
         FileNotFoundError: If the file does not exist.
         OSError: On other I/O errors.
     """
-    path = Path(file_path)
+    with open(file_path, "rb") as f:
+        return _parse_lines(f, file_path)
+
+
+def read_session_messages_from_bytes(
+    buf: bytes, file_path: str | Path
+) -> tuple[SessionMeta, list[ParsedMessage]]:
+    """Parse a transcript's contents already in memory.
+
+    Args:
+        buf: The full JSONL transcript.
+        file_path: Where the transcript lives; its stem is the fallback
+            session id and its name is used in log messages. It is not read.
+
+    Returns:
+        A tuple of ``(SessionMeta, list[ParsedMessage])``.
+    """
+    return _parse_lines(buf.split(b"\n"), file_path)
+
+
+def _parse_lines(
+    lines: Iterable[bytes], file_path: str | Path
+) -> tuple[SessionMeta, list[ParsedMessage]]:
+    """Build metadata and messages from raw JSONL lines, in file order."""
+    # Only the file name and stem are needed, so skip building a Path
+    file_name = os.path.basename(file_path)
     messages: list[ParsedMessage] = []
-    meta = SessionMeta(session_id=path.stem)
+    meta = SessionMeta(session_id=os.path.splitext(file_name)[0])
 
     first_entry: dict | None = None
     last_timestamp: str | None = None
 
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        for line_no, raw_line in enumerate(f, start=1):
-            stripped = raw_line.strip()
-            if not stripped:
-                continue
+    for line_no, raw_line in enumerate(lines, start=1):
+        stripped = raw_line.strip()
+        if not stripped:
+            continue
 
-            try:
-                entry = json.loads(stripped)
-            except (json.JSONDecodeError, ValueError):
-                logger.debug("Skipping malformed JSON at %s:%d", path.name, line_no)
-                continue
+        try:
+            entry = _loads_line(stripped)
+        except ValueError:
+            logger.debug("Skipping malformed JSON at %s:%d", file_name, line_no)
+            continue
 
-            # Capture first entry for metadata
-            if first_entry is None:
-                first_entry = entry
+        # Capture first entry for metadata
+        if first_entry is None:
+            first_entry = entry
 
-            # Track last timestamp for ended_at
-            ts = entry.get("timestamp")
-            if ts:
-                last_timestamp = ts
+        # Track last timestamp for ended_at
+        ts = entry.get("timestamp")
+        if ts:
+            last_timestamp = ts
 
-            entry_type = entry.get("type")
-            if entry_type not in _DISPLAYABLE_TYPES:
-                continue
+        entry_type = entry.get("type")
+        if entry_type not in _DISPLAYABLE_TYPES:
+            continue
 
-            entry_uuid = entry.get("uuid", f"line-{line_no}")
-            session_id = entry.get("sessionId", meta.session_id)
-            timestamp = ts or ""
+        entry_uuid = entry.get("uuid", f"line-{line_no}")
+        session_id = entry.get("sessionId", meta.session_id)
+        timestamp = ts or ""
 
-            if entry_type == "user":
-                msgs = _parse_user_entry(entry, entry_uuid, session_id, timestamp)
-            elif entry_type == "assistant":
-                msgs = _parse_assistant_entry(entry, entry_uuid, session_id, timestamp)
-            else:
-                continue
+        if entry_type == "user":
+            msgs = _parse_user_entry(entry, entry_uuid, session_id, timestamp)
+        elif entry_type == "assistant":
+            msgs = _parse_assistant_entry(entry, entry_uuid, session_id, timestamp)
+        else:
+            continue
 
-            messages.extend(msgs)
+        messages.extend(msgs)
 
     # Populate metadata from first entry
     if first_entry:
@@ -128,6 +156,18 @@ def read_session_messages(file_path: str | Path) -> tuple[SessionMeta, list[Pars
     return meta, messages
 
 
+def _loads_line(line: bytes) -> Any:
+    """Parse one JSONL line, raising ValueError if it is not JSON.
+
+    Invalid UTF-8 makes the bytes parser reject the whole line, so retry on
+    the decoded text with bad bytes replaced, as a text-mode read would.
+    """
+    try:
+        return fast_json.loads(line)
+    except ValueError:
+        return fast_json.loads(line.decode("utf-8", errors="replace"))
+
+
 def _parse_user_entry(
     entry: dict,
     entry_uuid: str,
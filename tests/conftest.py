@@ -1,25 +1,72 @@
 """Pytest configuration and fixtures for ZURK tests."""
 
+import contextlib
+import functools
+import os
+
 import pytest
+import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
 from unittest.mock import AsyncMock, MagicMock
 
 from src.models import Base, Project, Session, SessionStatus, Message
 from src.api.app import create_app
-from src.models.base import get_db
+from src.models.base import get_db, json_deserializer, json_serializer
 from src.api.deps import get_agent_runtime, get_approval_handler_dep, reset_agent_runtime, reset_background_engine
 from src.core.approval_handler import ApprovalHandler, reset_approval_handler
-from src.config import Settings
+from src.config import Settings, clear_settings_cache
 
 
-@pytest.fixture
-async def db_engine():
-    """Create an in-memory SQLite engine for testing."""
+def _isolate_default_database() -> None:
+    """Point the app's default DATABASE_URL at a private in-memory database.
+
+    Fixtures build their own engines, but anything that falls back to
+    get_settings() (get_engine, the background-task engine) would otherwise
+    open ./data/agent_center.db — the developer's real database, and one
+    file shared by every pytest-xdist worker. In-memory SQLite is private to
+    each worker process, so ``-n auto`` runs need no per-worker naming.
+    An explicit DATABASE_URL always wins.
+    """
+    if os.environ.get("DATABASE_URL"):
+        return
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+    clear_settings_cache()
+
+
+_isolate_default_database()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def _shared_db_engine():
+    """One in-memory SQLite engine for the whole run.
+
+    StaticPool pins the single connection that owns the :memory: database,
+    so the schema is created once instead of per test.
+    """
     engine = create_async_engine(
         "sqlite+aiosqlite:///:memory:",
         echo=False,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
     )
+
+    # The sqlite3 driver defers BEGIN until the first DML statement, so a
+    # SAVEPOINT issued first would open (and RELEASE would commit) the real
+    # transaction. Take BEGIN away from the driver so SQLAlchemy's outer
+    # transaction is a real one that db_session can roll back.
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield engine
@@ -27,15 +74,75 @@ async def db_engine():
 
 
 @pytest.fixture
-async def db_session(db_engine) -> AsyncSession:
-    """Create a database session for testing."""
-    factory = async_sessionmaker(
-        db_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-    )
-    async with factory() as session:
-        yield session
+async def db_engine(_shared_db_engine):
+    """The shared test engine, emptied again after each test."""
+    yield _shared_db_engine
+    async with _shared_db_engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+
+
+@pytest.fixture
+async def db_session(_shared_db_engine) -> AsyncSession:
+    """Create a database session for testing.
+
+    The session runs inside an outer transaction that is rolled back at
+    teardown; its own commit() calls only release SAVEPOINTs, so nothing
+    a test writes outlives it.
+    """
+    async with _shared_db_engine.connect() as conn:
+        outer = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await outer.rollback()
+
+
+# Transaction bookkeeping the test harness itself emits (db_session runs in
+# SAVEPOINTs); not round-trips the code under test asked for
+_TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK")
+
+
+@contextlib.contextmanager
+def _count_queries(engine):
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not statement.startswith(_TRANSACTION_CONTROL):
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+
+@pytest.fixture
+def count_queries(_shared_db_engine):
+    """Record the SQL sent to the database inside a ``with`` block.
+
+    Usage: ``with count_queries() as q: ...`` then ``assert len(q) <= K``
+    to pin how many round-trips the wrapped call is allowed. Transaction
+    control statements (BEGIN/SAVEPOINT/RELEASE/ROLLBACK) aren't counted.
+    """
+    return functools.partial(_count_queries, _shared_db_engine)
+
+
+@pytest.fixture
+def case_dir(tmp_path_factory):
+    """A fresh, empty directory under the session's shared temp root.
+
+    Cheaper than a per-test TemporaryDirectory: one mkdir per test, and
+    pytest reclaims the whole tree at once.
+    """
+    return tmp_path_factory.mktemp("proj", numbered=True)
 
 
 @pytest.fixture
@@ -57,7 +164,6 @@ async def sample_project(db_session: AsyncSession, sample_project_data: dict) ->
     project = Project(**sample_project_data)
     db_session.add(project)
     await db_session.commit()
-    await db_session.refresh(project)
     return project
 
 
@@ -82,7 +188,6 @@ async def sample_session(
     session_obj = Session(**sample_session_data)
     db_session.add(session_obj)
     await db_session.commit()
-    await db_session.refresh(session_obj)
     return session_obj
 
 
@@ -108,7 +213,6 @@ async def sample_message(
     message = Message(**sample_message_data)
     db_session.add(message)
     await db_session.commit()
-    await db_session.refresh(message)
     return message
 
 
@@ -25,6 +25,7 @@ from src.utils.diff_generator import (
     PREVIEW_TAIL_LINES,
     _build_preview,
     _is_binary,
+    _is_binary_bytes,
     _format_bytes,
     _finalize_diff,
 )
@@ -507,6 +508,25 @@ class TestBinaryDetection:
         assert "Binary file img.png" in result["diff"]
         assert "KB" in result["diff"] or "B" in result["diff"]
 
+    def test_binary_bytes_detected(self):
+        assert _is_binary_bytes(b"hello\x00world") is True
+        assert _is_binary_bytes(b"hello world") is False
+
+    def test_binary_bytes_beyond_check_size_not_detected(self):
+        assert _is_binary_bytes(b"a" * 10_000 + b"\x00") is False
+
+    def test_binary_bytes_write_uses_raw_size(self):
+        """Bytes content is sized without decoding."""
+        content = b"\x89PNG\x00" + b"\xff" * 2043
+        result = generate_write_diff("/img.png", content)
+        assert result["diff"] == "Binary file img.png (2.0 KB)"
+        assert result["total_bytes"] == 2048
+
+    def test_text_bytes_write_produces_diff(self):
+        result = generate_write_diff("/f.py", b"line1\nline2\n")
+        assert result["diff_stats"]["additions"] == 2
+        assert "+line1" in result["diff"]
+
 
 # =============================================================================
 # Format Bytes Helper
@@ -563,6 +583,12 @@ class TestFinalizeDiff:
         assert result["total_bytes"] == len(full.encode())
         assert "lines omitted" in result["diff"]
 
+    def test_total_bytes_counts_utf8_encoding(self):
+        lines = ["+caf\u00e9\n"]
+        result = _finalize_diff(lines, "low")
+        assert result["total_bytes"] == len("+caf\u00e9\n".encode())
+        assert result["total_bytes"] == 7
+
 
 # =============================================================================
 # Integration with ApprovalHandler
@@ -0,0 +1,36 @@
+"""Tests for the fast_json helpers (orjson fast path + stdlib fallback)."""
+
+import json
+
+import pytest
+
+from src.utils import fast_json
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    """Run each test against both backends."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+class TestFastJson:
+    def test_dumps_returns_compact_bytes(self, backend):
+        assert fast_json.dumps({"pid": 1, "port": 5173}) == b'{"pid":1,"port":5173}'
+
+    def test_dumps_keeps_unicode_as_utf8(self, backend):
+        assert fast_json.dumps({"name": "café"}) == '{"name":"café"}'.encode()
+
+    def test_loads_accepts_bytes_and_str(self, backend):
+        assert fast_json.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+        assert fast_json.loads('{"a": [1, 2]}') == {"a": [1, 2]}
+
+    def test_loads_accepts_memoryview(self, backend):
+        assert fast_json.loads(memoryview(b'{"a": 1}')) == {"a": 1}
+
+    def test_invalid_json_raises_stdlib_error(self, backend):
+        with pytest.raises(json.JSONDecodeError):
+            fast_json.loads(b"not-json")
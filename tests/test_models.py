@@ -2,10 +2,11 @@
 
 import pytest
 from datetime import datetime, timezone
-from sqlalchemy import select
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models import Project, Session, SessionStatus, Message
+from src.models.base import json_serializer
 
 
 class TestProjectModel:
@@ -148,6 +149,29 @@ class TestSessionModel:
         assert sample_session.pending_approval["tool_name"] == "Write"
         assert sample_session.status_enum == SessionStatus.WAITING_APPROVAL
 
+    async def test_pending_approval_round_trips_exactly(
+        self, db_session: AsyncSession, sample_session: Session
+    ):
+        """The JSON column stores compact UTF-8 and reads back the same dict."""
+        approval = {
+            "tool_name": "Edit",
+            "tool_input": {"path": "caf\u00e9.py", "old": "\u2014", "lines": [1, 2.5, None]},
+            "diff_stats": {"additions": 3, "deletions": 0},
+        }
+        sample_session.pending_approval = approval
+        await db_session.commit()
+
+        raw = await db_session.scalar(
+            text("SELECT pending_approval FROM sessions WHERE id = :id"),
+            {"id": sample_session.id},
+        )
+        assert raw == json_serializer(approval)
+        assert "caf\u00e9" in raw
+
+        db_session.expunge_all()
+        fetched = await db_session.get(Session, sample_session.id)
+        assert fetched.pending_approval == approval
+
     async def test_session_to_dict(self, sample_session: Session):
         """Test session to_dict method."""
         data = sample_session.to_dict()
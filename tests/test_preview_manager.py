@@ -5,19 +5,30 @@ subprocesses including start/stop, PID file handling, port detection,
 orphan recovery, and URL construction.
 """
 
+import copy
 import json
 import os
+import socket
+import socketserver
+import subprocess
 import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
 from src.services.preview_manager import (
+    NET_IDENTITY_TTL_SECONDS,
     PreviewManager,
     PreviewStatus,
     ProcessInfo,
+    _query_tailscale_localapi,
+    _split_command,
+    _split_command_cached,
 )
 
 
@@ -26,11 +37,18 @@ from src.services.preview_manager import (
 # =============================================================================
 
 
+@pytest.fixture(scope="module")
+def _module_pid_dir(tmp_path_factory):
+    """One PID directory shared by every test in this module."""
+    return Path(os.path.realpath(tmp_path_factory.mktemp("pids")))
+
+
 @pytest.fixture
-def pid_dir():
-    """Provide a temporary directory for PID files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield Path(os.path.realpath(tmpdir))
+def pid_dir(_module_pid_dir):
+    """Provide the shared PID directory, emptied after each test."""
+    yield _module_pid_dir
+    for path in _module_pid_dir.iterdir():
+        path.unlink()
 
 
 @pytest.fixture
@@ -61,15 +79,123 @@ def make_project(project_dir):
     return _make
 
 
-@pytest.fixture
-def manager(pid_dir):
-    """Create a PreviewManager instance with a temporary PID directory."""
-    mgr = PreviewManager.__new__(PreviewManager)
-    mgr._processes = {}
-    mgr._tailscale_ip = None
+@pytest.fixture(scope="module")
+def _module_manager(_module_pid_dir):
+    """One PreviewManager shared by the module, built through its real __init__.
+
+    Returns the manager with a snapshot of its just-constructed state, which
+    _reset_manager restores before every test.
+    """
+    with patch.object(PreviewManager, "PID_DIR", _module_pid_dir):
+        mgr = PreviewManager()
+    # Pin it on the instance so it outlives the class patch
+    mgr.PID_DIR = _module_pid_dir
+    # Tests opt into Tailscale lookups explicitly
     mgr._tailscale_checked = True
-    mgr.PID_DIR = pid_dir
-    return mgr
+    return mgr, dict(vars(mgr))
+
+
+@pytest.fixture(autouse=True)
+def _reset_manager(_module_manager):
+    """Restore the shared manager's instance state, copying mutable containers."""
+    mgr, initial = _module_manager
+    state = vars(mgr)
+    state.clear()
+    state.update({name: copy.copy(value) for name, value in initial.items()})
+
+
+@pytest.fixture
+def manager(_module_manager, pid_dir):
+    """The shared PreviewManager, freshly reset, with PID files in pid_dir."""
+    return _module_manager[0]
+
+
+class FakePopen:
+    """Lightweight stand-in for subprocess.Popen (no MagicMock overhead)."""
+
+    __slots__ = ("args", "kwargs", "pid", "returncode", "terminated")
+
+    def __init__(self, args, *, pid, returncode=None, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.pid = pid
+        self.returncode = returncode
+        self.terminated = False
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def terminate(self):
+        self.terminated = True
+        if self.returncode is None:
+            self.returncode = -15
+
+    def kill(self):
+        self.terminate()
+
+
+class PopenRecorder:
+    """subprocess.Popen replacement that records every FakePopen it spawns.
+
+    Set ``pid`` / ``returncode`` before starting a preview to configure
+    the next process; ``last`` is the most recently spawned one.
+    """
+
+    __slots__ = ("procs", "pid", "returncode")
+
+    def __init__(self):
+        self.procs: list[FakePopen] = []
+        self.pid = 10000
+        self.returncode = None
+
+    def __call__(self, args, **kwargs):
+        proc = FakePopen(args, pid=self.pid, returncode=self.returncode, **kwargs)
+        self.pid += 1
+        self.procs.append(proc)
+        return proc
+
+    @property
+    def last(self) -> FakePopen:
+        return self.procs[-1]
+
+
+def _build_socket_mock(connect_result: int) -> Mock:
+    """A socket mock usable as a context manager whose connect_ex returns connect_result.
+
+    Plain Mock with a socket spec: only the context-manager dunders are
+    wired up, instead of MagicMock's full set.
+    """
+    sock = Mock(spec=socket.socket)
+    sock.__enter__ = Mock(return_value=sock)
+    sock.__exit__ = Mock(return_value=False)
+    sock.connect_ex = Mock(return_value=connect_result)
+    # _get_lan_ip reads the local address off a UDP socket
+    sock.getsockname = Mock(return_value=("127.0.0.1", 0))
+    return sock
+
+
+# Built once at import; _mock_port_free / _mock_port_in_use patch these in.
+_MOCK_FREE = _build_socket_mock(1)
+_MOCK_IN_USE = _build_socket_mock(0)
+
+
+@pytest.fixture(autouse=True)
+def _reset_socket_mocks():
+    """Clear call history on the shared socket mocks between tests."""
+    yield
+    _MOCK_FREE.reset_mock()
+    _MOCK_IN_USE.reset_mock()
+
+
+@pytest.fixture(autouse=True)
+def popen(monkeypatch):
+    """Replace subprocess.Popen with a PopenRecorder for every test."""
+    recorder = PopenRecorder()
+    monkeypatch.setattr(subprocess, "Popen", recorder)
+    return recorder
 
 
 @pytest.fixture(autouse=True)
@@ -87,16 +213,13 @@ def _no_startup_delay():
 class TestStartPreview:
     """Tests for PreviewManager.start_preview()."""
 
-    async def test_start_preview_success(self, manager, make_project):
+    async def test_start_preview_success(self, manager, make_project, popen):
         """Starting a preview launches a subprocess and returns running status."""
         project = make_project()
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 12345
-        mock_proc.poll.return_value = None  # Still running
+        popen.pid = 12345
 
-        with patch("subprocess.Popen", return_value=mock_proc) as popen_mock, \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             status = await manager.start_preview(project)
 
@@ -106,21 +229,16 @@ class TestStartPreview:
         assert status.error is None
 
         # Popen should have been called with shlex-split command (list, not string)
-        popen_mock.assert_called_once()
-        call_args = popen_mock.call_args
-        args_passed = call_args[0][0] if call_args[0] else call_args[1].get("args")
-        assert isinstance(args_passed, list)
+        assert len(popen.procs) == 1
+        assert isinstance(popen.last.args, list)
 
-    async def test_start_preview_creates_pid_file(self, manager, make_project, pid_dir):
+    async def test_start_preview_creates_pid_file(self, manager, make_project, pid_dir, popen):
         """Starting a preview writes a JSON PID file to the PID directory."""
         project = make_project(project_id="proj-42")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 9999
-        mock_proc.poll.return_value = None
+        popen.pid = 9999
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -131,15 +249,13 @@ class TestStartPreview:
         assert data["pid"] == 9999
         assert data["port"] == 5173
         assert data["project_id"] == "proj-42"
-        assert "started_at" in data
+        assert "started_at_ns" in data
 
-    async def test_start_preview_port_occupied_reroutes(self, manager, make_project):
+    async def test_start_preview_port_occupied_reroutes(self, manager, make_project, popen):
         """When preferred port is in use, manager finds the next free port."""
         project = make_project(dev_port=5173)
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 12345
-        mock_proc.poll.return_value = None  # Still running
+        popen.pid = 12345
 
         # Port 5173 is in use, 5174 is free
         call_count = 0
@@ -155,14 +271,28 @@ class TestStartPreview:
         mock_sock.__exit__ = MagicMock(return_value=False)
         mock_sock.connect_ex.side_effect = connect_ex_side_effect
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             patch("socket.socket", return_value=mock_sock), \
+        with patch("socket.socket", return_value=mock_sock), \
              _mock_detect_vite():
             status = await manager.start_preview(project)
 
         assert status.running is True
         assert status.port == 5174  # Rerouted to next free port
 
+    async def test_find_free_port_picks_lowest_free(self, manager):
+        """Probing skips busy ports and returns the lowest free one."""
+        busy = {5173, 5174, 5175, 5177}
+
+        def connect_ex_side_effect(addr):
+            return 0 if addr[1] in busy else 1
+
+        mock_sock = MagicMock()
+        mock_sock.__enter__ = MagicMock(return_value=mock_sock)
+        mock_sock.__exit__ = MagicMock(return_value=False)
+        mock_sock.connect_ex.side_effect = connect_ex_side_effect
+
+        with patch("socket.socket", return_value=mock_sock):
+            assert manager._find_free_port(5173) == 5176
+
     async def test_start_preview_no_dev_command(self, manager, make_project):
         """Starting without a dev_command should return an error."""
         project = make_project(dev_command=None, dev_port=None)
@@ -172,16 +302,13 @@ class TestStartPreview:
         assert status.running is False
         assert status.error is not None
 
-    async def test_start_preview_already_running(self, manager, make_project):
+    async def test_start_preview_already_running(self, manager, make_project, popen):
         """Starting when a preview is already running returns error/running status."""
         project = make_project()
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 1111
-        mock_proc.poll.return_value = None
+        popen.pid = 1111
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             first = await manager.start_preview(project)
             assert first.running is True
@@ -195,23 +322,32 @@ class TestStartPreview:
         assert second.error is not None
         assert "already running" in second.error.lower()
 
-    async def test_start_preview_uses_shlex_not_shell(self, manager, make_project):
+    async def test_start_preview_uses_shlex_not_shell(self, manager, make_project, popen):
         """Security: commands are split with shlex, not run with shell=True."""
         project = make_project(dev_command="npm run dev -- --host 0.0.0.0")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 5555
-        mock_proc.poll.return_value = None
+        popen.pid = 5555
 
-        with patch("subprocess.Popen", return_value=mock_proc) as popen_mock, \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
-        call_kwargs = popen_mock.call_args[1] if popen_mock.call_args[1] else {}
+        call_kwargs = popen.last.kwargs
         # shell=True should NOT be used
         assert call_kwargs.get("shell") is not True
 
+    async def test_split_command_memoized(self):
+        """Dev commands are shlex-split once and returned as fresh lists."""
+        _split_command_cached.cache_clear()
+        cmd = "npm run dev -- --host '0.0.0.0'"
+
+        first = _split_command(cmd)
+        second = _split_command(cmd)
+
+        assert first == ["npm", "run", "dev", "--", "--host", "0.0.0.0"]
+        assert first == second and first is not second
+        assert _split_command_cached.cache_info().hits == 1
+
     async def test_start_preview_no_dev_port(self, manager, make_project):
         """Starting with dev_command but no dev_port should return error."""
         project = make_project(dev_command="npm run dev", dev_port=None)
@@ -221,39 +357,33 @@ class TestStartPreview:
         assert status.running is False
         assert status.error is not None
 
-    async def test_start_preview_cra_sets_host_env(self, manager, make_project):
+    async def test_start_preview_cra_sets_host_env(self, manager, make_project, popen):
         """CRA projects set HOST=0.0.0.0 in environment instead of CLI flag."""
         project = make_project(dev_command="npm start", dev_port=3000)
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 6666
-        mock_proc.poll.return_value = None
+        popen.pid = 6666
 
-        with patch("subprocess.Popen", return_value=mock_proc) as popen_mock, \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              patch(
                  "src.services.preview_manager.detect_project_type",
                  return_value=("npm start", 3000, "cra"),
              ):
             await manager.start_preview(project)
 
-        call_kwargs = popen_mock.call_args[1]
+        call_kwargs = popen.last.kwargs
         env = call_kwargs.get("env")
         assert env is not None
         assert env.get("HOST") == "0.0.0.0"
 
 
-    async def test_start_preview_process_dies_immediately(self, manager, make_project):
+    async def test_start_preview_process_dies_immediately(self, manager, make_project, popen):
         """If the process exits during startup grace period, return error with stderr."""
         project = make_project()
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 7777
-        mock_proc.poll.return_value = 1  # Already exited
-        mock_proc.returncode = 1
+        popen.pid = 7777
+        popen.returncode = 1
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             # Write fake stderr to the log file
             log_file = manager.PID_DIR / f"{project.id}.log"
@@ -265,17 +395,14 @@ class TestStartPreview:
         assert status.error is not None
         assert "exited immediately" in status.error.lower() or "Cannot find" in status.error
 
-    async def test_start_preview_crash_no_pid_file(self, manager, make_project, pid_dir):
+    async def test_start_preview_crash_no_pid_file(self, manager, make_project, pid_dir, popen):
         """If process dies during startup, no PID file should be written."""
         project = make_project(project_id="crash-proj")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 8888
-        mock_proc.poll.return_value = 1
-        mock_proc.returncode = 1
+        popen.pid = 8888
+        popen.returncode = 1
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -292,34 +419,28 @@ class TestStartPreview:
 class TestStopPreview:
     """Tests for PreviewManager.stop_preview()."""
 
-    async def test_stop_preview_success(self, manager, make_project, pid_dir):
+    async def test_stop_preview_success(self, manager, make_project, pid_dir, popen):
         """Stopping a running preview terminates the process and cleans up."""
         project = make_project(project_id="proj-stop")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 7777
-        mock_proc.poll.return_value = None
+        popen.pid = 7777
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
         status = await manager.stop_preview("proj-stop")
 
         assert status.running is False
-        mock_proc.terminate.assert_called()
+        assert popen.last.terminated is True
 
-    async def test_stop_preview_removes_pid_file(self, manager, make_project, pid_dir):
+    async def test_stop_preview_removes_pid_file(self, manager, make_project, pid_dir, popen):
         """Stopping removes the PID file."""
         project = make_project(project_id="proj-pid")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 8888
-        mock_proc.poll.return_value = None
+        popen.pid = 8888
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -337,16 +458,13 @@ class TestStopPreview:
         assert status.running is False
         assert status.error is not None
 
-    async def test_stop_preview_removes_from_processes(self, manager, make_project):
+    async def test_stop_preview_removes_from_processes(self, manager, make_project, popen):
         """After stop, the project is no longer tracked in _processes."""
         project = make_project(project_id="proj-track")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 1234
-        mock_proc.poll.return_value = None
+        popen.pid = 1234
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -365,16 +483,13 @@ class TestStopPreview:
 class TestGetStatus:
     """Tests for PreviewManager.get_status()."""
 
-    async def test_get_status_running(self, manager, make_project):
+    async def test_get_status_running(self, manager, make_project, popen):
         """Status of a running preview includes pid, port, url."""
         project = make_project(project_id="proj-status")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 3333
-        mock_proc.poll.return_value = None  # Still running
+        popen.pid = 3333
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -394,16 +509,13 @@ class TestGetStatus:
         assert status.port is None
         assert status.url is None
 
-    async def test_get_status_includes_url(self, manager, make_project):
+    async def test_get_status_includes_url(self, manager, make_project, popen):
         """Status of a running preview includes a URL with the port."""
         project = make_project(project_id="proj-url")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 4444
-        mock_proc.poll.return_value = None
+        popen.pid = 4444
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -413,16 +525,13 @@ class TestGetStatus:
         assert status.url is not None
         assert "5173" in status.url
 
-    async def test_get_status_uptime(self, manager, make_project):
+    async def test_get_status_uptime(self, manager, make_project, popen):
         """Status includes uptime_seconds for running previews."""
         project = make_project(project_id="proj-uptime")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 5555
-        mock_proc.poll.return_value = None
+        popen.pid = 5555
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -432,21 +541,26 @@ class TestGetStatus:
         assert status.uptime_seconds is not None
         assert status.uptime_seconds >= 0
 
-    async def test_get_status_cleans_dead_process(self, manager, make_project, pid_dir):
+    async def test_uptime_from_started_at_ns(self):
+        """Uptime is whole seconds since started_at_ns."""
+        info = ProcessInfo(
+            pid=1, port=1, project_id="x", project_path="/x",
+            started_at_ns=time.time_ns() - 90_500_000_000, process=None,
+        )
+        assert PreviewManager._uptime(info) == 90
+
+    async def test_get_status_cleans_dead_process(self, manager, make_project, pid_dir, popen):
         """If the tracked process is dead, get_status cleans it up."""
         project = make_project(project_id="proj-dead")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 6666
-        mock_proc.poll.return_value = None  # Alive during start
+        popen.pid = 6666
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
         # Now the process dies
-        mock_proc.poll.return_value = 1  # Exited
+        popen.last.returncode = 1
 
         status = manager.get_status("proj-dead")
 
@@ -472,6 +586,20 @@ class TestDetectRunning:
         with _mock_port_free():
             assert manager.detect_running(5173) is False
 
+    async def test_detect_running_real_listener(self, manager):
+        """A real listening socket on loopback is detected."""
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen()
+            assert manager.detect_running(server.getsockname()[1]) is True
+
+    async def test_detect_running_real_closed_port(self, manager):
+        """A real closed loopback port is reported as free."""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        assert manager.detect_running(port) is False
+
 
 # =============================================================================
 # cleanup_all
@@ -481,40 +609,30 @@ class TestDetectRunning:
 class TestCleanupAll:
     """Tests for PreviewManager.cleanup_all()."""
 
-    async def test_cleanup_all_terminates_processes(self, manager, make_project):
+    async def test_cleanup_all_terminates_processes(self, manager, make_project, popen):
         """cleanup_all terminates all tracked processes."""
-        procs = []
-        for i in range(3):
-            project = make_project(
-                project_id=f"proj-{i}",
-                dev_port=5173 + i,
-            )
-
-            mock_proc = MagicMock()
-            mock_proc.pid = 10000 + i
-            mock_proc.poll.return_value = None
-            procs.append(mock_proc)
-
-            with patch("subprocess.Popen", return_value=mock_proc), \
-                 _mock_port_free(), \
-                 _mock_detect_vite():
+        with _mock_port_free(), \
+             _mock_detect_vite():
+            for i in range(3):
+                project = make_project(
+                    project_id=f"proj-{i}",
+                    dev_port=5173 + i,
+                )
                 await manager.start_preview(project)
 
         await manager.cleanup_all()
 
-        for proc in procs:
-            proc.terminate.assert_called()
+        assert len(popen.procs) == 3
+        for proc in popen.procs:
+            assert proc.terminated is True
 
-    async def test_cleanup_all_clears_processes_dict(self, manager, make_project):
+    async def test_cleanup_all_clears_processes_dict(self, manager, make_project, popen):
         """cleanup_all empties the _processes tracking dict."""
         project = make_project(project_id="proj-clear")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 9876
-        mock_proc.poll.return_value = None
+        popen.pid = 9876
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -524,16 +642,13 @@ class TestCleanupAll:
 
         assert len(manager._processes) == 0
 
-    async def test_cleanup_all_removes_pid_files(self, manager, make_project, pid_dir):
+    async def test_cleanup_all_removes_pid_files(self, manager, make_project, pid_dir, popen):
         """cleanup_all removes all PID files."""
         project = make_project(project_id="proj-files")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 5432
-        mock_proc.poll.return_value = None
+        popen.pid = 5432
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -556,16 +671,13 @@ class TestCleanupAll:
 class TestPidFileLifecycle:
     """Tests for PID file creation and removal."""
 
-    async def test_pid_file_is_valid_json(self, manager, make_project, pid_dir):
+    async def test_pid_file_is_valid_json(self, manager, make_project, pid_dir, popen):
         """PID file is valid JSON with expected fields."""
         project = make_project(project_id="pid-json", dev_port=3000)
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 6666
-        mock_proc.poll.return_value = None
+        popen.pid = 6666
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -576,18 +688,32 @@ class TestPidFileLifecycle:
         assert data["port"] == 3000
         assert data["project_id"] == "pid-json"
         assert "project_path" in data
-        assert "started_at" in data
+        assert "started_at_ns" in data
+
+    async def test_pid_file_written_atomically(self, manager, make_project, pid_dir, popen):
+        """PID file is written via a temp file that does not linger."""
+        project = make_project(project_id="pid-atomic")
+
+        popen.pid = 6767
+
+        with _mock_port_free(), \
+             _mock_detect_vite(), \
+             patch("os.replace", wraps=os.replace) as replace_mock:
+            await manager.start_preview(project)
 
-    async def test_pid_file_removed_on_stop(self, manager, make_project, pid_dir):
+        pid_file = pid_dir / "pid-atomic.pid"
+        replace_mock.assert_called_once_with(pid_dir / "pid-atomic.pid.tmp", pid_file)
+        assert json.loads(pid_file.read_bytes())["pid"] == 6767
+        assert not (pid_dir / "pid-atomic.pid.tmp").exists()
+        assert pid_file.stat().st_mode & 0o777 == 0o600
+
+    async def test_pid_file_removed_on_stop(self, manager, make_project, pid_dir, popen):
         """PID file is removed when preview stops."""
         project = make_project(project_id="pid-rm")
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 7777
-        mock_proc.poll.return_value = None
+        popen.pid = 7777
 
-        with patch("subprocess.Popen", return_value=mock_proc), \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
@@ -614,11 +740,12 @@ class TestOrphanRecovery:
             "port": 5173,
             "project_id": "orphan-alive",
             "project_path": "/tmp/fake-project",
-            "started_at": datetime.now(timezone.utc).isoformat(),
+            "started_at_ns": time.time_ns(),
         }
         pid_file.write_text(json.dumps(pid_data))
 
-        with patch.object(PreviewManager, "_pid_exists", return_value=True):
+        with patch.object(PreviewManager, "_live_pids", return_value={54321}), \
+             patch.object(PreviewManager, "_pid_matches", return_value=True):
             manager._recover_orphans()
 
         assert "orphan-alive" in manager._processes
@@ -627,6 +754,34 @@ class TestOrphanRecovery:
         assert info.port == 5173
         assert info.process is None  # Recovered, no Popen handle
 
+    async def test_recover_legacy_iso_started_at(self, manager, pid_dir):
+        """PID files written before started_at_ns still recover."""
+        started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        pid_file = pid_dir / "orphan-legacy.pid"
+        pid_file.write_text(json.dumps({
+            "pid": 4242,
+            "port": 5173,
+            "project_id": "orphan-legacy",
+            "project_path": "/tmp/legacy",
+            "started_at": started.isoformat(),
+        }))
+
+        with patch.object(PreviewManager, "_live_pids", return_value={4242}), \
+             patch.object(PreviewManager, "_pid_matches", return_value=True):
+            manager._recover_orphans()
+
+        info = manager._processes["orphan-legacy"]
+        assert info.started_at_ns == int(started.timestamp()) * 1_000_000_000
+
+    async def test_recover_missing_started_at(self, manager, pid_dir):
+        """PID file with no start time at all is removed."""
+        pid_file = pid_dir / "orphan-nostart.pid"
+        pid_file.write_text(json.dumps({"pid": 1, "port": 1, "project_path": "/x"}))
+
+        manager._recover_orphans()
+
+        assert not pid_file.exists()
+
     async def test_recover_stale_orphan(self, manager, pid_dir):
         """PID file with a dead process is removed, not tracked."""
         pid_file = pid_dir / "orphan-dead.pid"
@@ -635,11 +790,11 @@ class TestOrphanRecovery:
             "port": 3000,
             "project_id": "orphan-dead",
             "project_path": "/tmp/dead-project",
-            "started_at": datetime.now(timezone.utc).isoformat(),
+            "started_at_ns": time.time_ns(),
         }
         pid_file.write_text(json.dumps(pid_data))
 
-        with patch.object(PreviewManager, "_pid_exists", return_value=False):
+        with patch.object(PreviewManager, "_live_pids", return_value=set()):
             manager._recover_orphans()
 
         assert not pid_file.exists()
@@ -665,9 +820,29 @@ class TestOrphanRecovery:
         assert not pid_file.exists()
         assert "orphan-partial" not in manager._processes
 
+    async def test_recover_empty_pid_file(self, manager, pid_dir):
+        """Zero-byte PID file is removed without being parsed."""
+        pid_file = pid_dir / "orphan-empty.pid"
+        pid_file.write_bytes(b"")
+
+        manager._recover_orphans()
+
+        assert not pid_file.exists()
+        assert "orphan-empty" not in manager._processes
+
+    async def test_recover_ignores_non_pid_files(self, manager, pid_dir):
+        """Log files alongside PID files are left untouched."""
+        log_file = pid_dir / "proj.log"
+        log_file.write_text("some stderr\n")
+
+        manager._recover_orphans()
+
+        assert log_file.exists()
+        assert manager._processes == {}
+
     async def test_recover_multiple_orphans(self, manager, pid_dir):
         """Multiple PID files are all processed."""
-        now = datetime.now(timezone.utc).isoformat()
+        now = time.time_ns()
 
         for i in range(3):
             pid_file = pid_dir / f"multi-{i}.pid"
@@ -676,17 +851,67 @@ class TestOrphanRecovery:
                 "port": 5000 + i,
                 "project_id": f"multi-{i}",
                 "project_path": f"/tmp/project-{i}",
-                "started_at": now,
+                "started_at_ns": now,
             }
             pid_file.write_text(json.dumps(pid_data))
 
-        with patch.object(PreviewManager, "_pid_exists", return_value=True):
+        with patch.object(PreviewManager, "_live_pids", return_value={20000, 20001, 20002}), \
+             patch.object(PreviewManager, "_pid_matches", return_value=True):
             manager._recover_orphans()
 
         assert len(manager._processes) == 3
         for i in range(3):
             assert f"multi-{i}" in manager._processes
 
+    async def test_recover_falls_back_to_pid_exists(self, manager, pid_dir):
+        """Without /proc, liveness is checked per PID."""
+        pid_file = pid_dir / "orphan-noproc.pid"
+        pid_file.write_text(json.dumps({
+            "pid": 31337,
+            "port": 5173,
+            "project_id": "orphan-noproc",
+            "project_path": "/tmp/noproc",
+            "started_at_ns": time.time_ns(),
+        }))
+
+        with patch.object(PreviewManager, "_live_pids", return_value=None), \
+             patch.object(PreviewManager, "_pid_exists", return_value=True) as exists_mock:
+            manager._recover_orphans()
+
+        exists_mock.assert_called_once_with(31337)
+        assert "orphan-noproc" in manager._processes
+
+    async def test_recover_reused_pid(self, manager, pid_dir):
+        """A live PID running somewhere other than the project is not adopted."""
+        pid_file = pid_dir / "orphan-reused.pid"
+        pid_file.write_text(json.dumps({
+            "pid": 777,
+            "port": 5173,
+            "project_id": "orphan-reused",
+            "project_path": "/tmp/reused",
+            "started_at_ns": time.time_ns(),
+        }))
+
+        with patch.object(PreviewManager, "_live_pids", return_value={777}), \
+             patch.object(PreviewManager, "_pid_matches", return_value=False) as match_mock:
+            manager._recover_orphans()
+
+        match_mock.assert_called_once_with(777, "/tmp/reused")
+        assert not pid_file.exists()
+        assert "orphan-reused" not in manager._processes
+
+    async def test_pid_matches_checks_cwd(self, tmp_path):
+        if PreviewManager._live_pids() is None:
+            pytest.skip("/proc not available")
+        assert PreviewManager._pid_matches(os.getpid(), os.getcwd()) is True
+        assert PreviewManager._pid_matches(os.getpid(), str(tmp_path)) is False
+
+    async def test_live_pids_includes_current_process(self):
+        live = PreviewManager._live_pids()
+        if live is None:
+            pytest.skip("/proc not available")
+        assert os.getpid() in live
+
     async def test_recover_no_pid_dir(self, manager):
         """_recover_orphans is a no-op if PID dir doesn't exist."""
         manager.PID_DIR = Path("/nonexistent/path/that/does/not/exist")
@@ -736,6 +961,31 @@ class TestUrlConstruction:
 
         assert url.startswith("http://")
 
+    async def test_net_identity_reused_within_ttl(self, manager):
+        """Repeated URL builds don't re-resolve addresses until the TTL lapses."""
+        with patch.object(manager, "_get_tailscale_ip", return_value=None) as ts_mock, \
+             patch.object(manager, "_get_lan_ip", return_value="192.168.1.7") as lan_mock:
+            for port in (3000, 3001, 3002):
+                assert manager._build_url(port) == f"http://192.168.1.7:{port}"
+
+        ts_mock.assert_called_once()
+        lan_mock.assert_called_once()
+
+    async def test_net_identity_refreshes_after_ttl(self, manager):
+        """An expired snapshot is re-resolved on the next URL build."""
+        with patch.object(manager, "_get_tailscale_ip", return_value=None), \
+             patch.object(manager, "_get_lan_ip", return_value="192.168.1.7"):
+            manager._build_url(3000)
+
+        ts_ip, lan_ip, fetched_at = manager._net_identity
+        manager._net_identity = (ts_ip, lan_ip, fetched_at - NET_IDENTITY_TTL_SECONDS - 1)
+
+        with patch.object(manager, "_get_tailscale_ip", return_value="100.64.0.9"), \
+             patch.object(manager, "_get_lan_ip") as lan_mock:
+            assert manager._build_url(3000) == "http://100.64.0.9:3000"
+
+        lan_mock.assert_not_called()
+
     async def test_get_tailscale_ip_when_available(self, manager):
         """_get_tailscale_ip returns IP from tailscale command output."""
         # Reset cache so the method actually runs
@@ -746,7 +996,8 @@ class TestUrlConstruction:
         mock_result.returncode = 0
         mock_result.stdout = "100.100.1.1\n"
 
-        with patch("subprocess.run", return_value=mock_result):
+        with _mock_tailscale_cli(), \
+             patch("subprocess.run", return_value=mock_result):
             ip = manager._get_tailscale_ip()
 
         assert ip == "100.100.1.1"
@@ -756,11 +1007,62 @@ class TestUrlConstruction:
         manager._tailscale_checked = False
         manager._tailscale_ip = None
 
-        with patch("subprocess.run", side_effect=FileNotFoundError):
+        with _mock_tailscale_cli(), \
+             patch("subprocess.run", side_effect=FileNotFoundError):
             ip = manager._get_tailscale_ip()
 
         assert ip is None
 
+    async def test_get_tailscale_ip_skips_fork_without_cli(self, manager):
+        """No subprocess is spawned when the tailscale CLI is not on PATH."""
+        manager._tailscale_checked = False
+        manager._tailscale_ip = None
+
+        with _mock_tailscale_cli(path=None), patch("subprocess.run") as mock_run:
+            ip = manager._get_tailscale_ip()
+
+        mock_run.assert_not_called()
+        assert ip is None
+
+    async def test_get_tailscale_ip_from_localapi(self, manager):
+        """LocalAPI status is preferred and its IPv4 address is used."""
+        manager._tailscale_checked = False
+        manager._tailscale_ip = None
+
+        status = {"Self": {"TailscaleIPs": ["fd7a:115c::1", "100.70.1.2"]}}
+        with patch(
+            "src.services.preview_manager._query_tailscale_localapi",
+            return_value=status,
+        ), patch("subprocess.run") as mock_run:
+            ip = manager._get_tailscale_ip()
+
+        mock_run.assert_not_called()
+        assert ip == "100.70.1.2"
+
+    async def test_query_localapi_over_unix_socket(self, tmp_path):
+        """_query_tailscale_localapi speaks HTTP over the daemon socket."""
+        sock_path = str(tmp_path / "tailscaled.sock")
+        body = json.dumps({"Self": {"TailscaleIPs": ["100.1.2.3"]}}).encode()
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.rfile.readline()
+                self.wfile.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: "
+                    + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+
+        with socketserver.UnixStreamServer(sock_path, Handler) as server:
+            thread = threading.Thread(target=server.handle_request)
+            thread.start()
+            status = _query_tailscale_localapi(sock_path)
+            thread.join(timeout=5)
+
+        assert status == {"Self": {"TailscaleIPs": ["100.1.2.3"]}}
+
+    async def test_query_localapi_missing_socket(self, tmp_path):
+        assert _query_tailscale_localapi(str(tmp_path / "missing.sock")) is None
+
     async def test_get_tailscale_ip_not_connected(self, manager):
         """_get_tailscale_ip returns None when tailscale returns non-zero."""
         manager._tailscale_checked = False
@@ -770,7 +1072,8 @@ class TestUrlConstruction:
         mock_result.returncode = 1
         mock_result.stdout = ""
 
-        with patch("subprocess.run", return_value=mock_result):
+        with _mock_tailscale_cli(), \
+             patch("subprocess.run", return_value=mock_result):
             ip = manager._get_tailscale_ip()
 
         assert ip is None
@@ -796,55 +1099,75 @@ class TestUrlConstruction:
 class TestSubprocessConfiguration:
     """Tests verifying that Popen is invoked with correct cwd, env, etc."""
 
-    async def test_popen_cwd_is_project_path(self, manager, make_project, project_dir):
+    async def test_popen_cwd_is_project_path(self, manager, make_project, project_dir, popen):
         """Subprocess is started in the project's directory."""
         project = make_project()
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 2222
-        mock_proc.poll.return_value = None
+        popen.pid = 2222
 
-        with patch("subprocess.Popen", return_value=mock_proc) as popen_mock, \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
-        call_kwargs = popen_mock.call_args[1]
+        call_kwargs = popen.last.kwargs
         assert os.path.realpath(call_kwargs["cwd"]) == project_dir
 
-    async def test_popen_stdout_devnull_stderr_logged(self, manager, make_project):
+    async def test_popen_stdout_devnull_stderr_logged(self, manager, make_project, popen):
         """Subprocess stdout goes to DEVNULL, stderr goes to a log file."""
         project = make_project()
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 3333
-        mock_proc.poll.return_value = None
+        popen.pid = 3333
 
-        with patch("subprocess.Popen", return_value=mock_proc) as popen_mock, \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
-        call_kwargs = popen_mock.call_args[1]
-        import subprocess as sp
-        assert call_kwargs.get("stdout") == sp.DEVNULL
+        call_kwargs = popen.last.kwargs
+        assert call_kwargs.get("stdout") == subprocess.DEVNULL
         # stderr is redirected to a log file (not DEVNULL)
-        assert call_kwargs.get("stderr") != sp.DEVNULL
+        assert call_kwargs.get("stderr") != subprocess.DEVNULL
+
+    async def test_popen_closes_inherited_fds(self, manager, make_project, popen):
+        """Popen keeps its close_fds default and our stderr log handle is closed."""
+        project = make_project()
+
+        with _mock_port_free(), _mock_detect_vite():
+            await manager.start_preview(project)
+
+        call_kwargs = popen.last.kwargs
+        assert call_kwargs.get("close_fds", True) is True
+        # Our copy of the log handle is closed once the child has been spawned
+        assert call_kwargs["stderr"].closed
 
-    async def test_popen_start_new_session(self, manager, make_project):
+    async def test_popen_runs_off_event_loop(self, manager, make_project, popen, monkeypatch):
+        """Popen is invoked from a worker thread, not the event loop thread."""
+        project = make_project()
+        spawn_threads = []
+
+        def recording_popen(args, **kwargs):
+            spawn_threads.append(threading.get_ident())
+            return popen(args, **kwargs)
+
+        monkeypatch.setattr(subprocess, "Popen", recording_popen)
+
+        with _mock_port_free(), \
+             _mock_detect_vite():
+            status = await manager.start_preview(project)
+
+        assert status.running is True
+        assert spawn_threads and spawn_threads[0] != threading.get_ident()
+
+    async def test_popen_start_new_session(self, manager, make_project, popen):
         """Subprocess is started in a new session (detached from ZURK)."""
         project = make_project()
 
-        mock_proc = MagicMock()
-        mock_proc.pid = 4444
-        mock_proc.poll.return_value = None
+        popen.pid = 4444
 
-        with patch("subprocess.Popen", return_value=mock_proc) as popen_mock, \
-             _mock_port_free(), \
+        with _mock_port_free(), \
              _mock_detect_vite():
             await manager.start_preview(project)
 
-        call_kwargs = popen_mock.call_args[1]
+        call_kwargs = popen.last.kwargs
         assert call_kwargs.get("start_new_session") is True
 
 
@@ -858,21 +1181,18 @@ class TestIsAlive:
 
     async def test_is_alive_with_popen_running(self, manager):
         """Process with Popen handle that is still running."""
-        mock_proc = MagicMock()
-        mock_proc.poll.return_value = None
         info = ProcessInfo(
             pid=1, port=1, project_id="x", project_path="/x",
-            started_at=datetime.now(timezone.utc), process=mock_proc,
+            started_at_ns=time.time_ns(), process=FakePopen([], pid=1),
         )
         assert manager._is_alive(info) is True
 
     async def test_is_alive_with_popen_exited(self, manager):
         """Process with Popen handle that has exited."""
-        mock_proc = MagicMock()
-        mock_proc.poll.return_value = 0
         info = ProcessInfo(
             pid=1, port=1, project_id="x", project_path="/x",
-            started_at=datetime.now(timezone.utc), process=mock_proc,
+            started_at_ns=time.time_ns(),
+            process=FakePopen([], pid=1, returncode=0),
         )
         assert manager._is_alive(info) is False
 
@@ -880,16 +1200,24 @@ class TestIsAlive:
         """Recovered process (no Popen handle) that is alive."""
         info = ProcessInfo(
             pid=1, port=1, project_id="x", project_path="/x",
-            started_at=datetime.now(timezone.utc), process=None,
+            started_at_ns=time.time_ns(), process=None,
         )
         with patch.object(PreviewManager, "_pid_exists", return_value=True):
             assert manager._is_alive(info) is True
 
+    async def test_process_info_has_no_instance_dict(self):
+        """ProcessInfo uses __slots__ to keep per-preview overhead small."""
+        info = ProcessInfo(
+            pid=1, port=1, project_id="x", project_path="/x",
+            started_at_ns=time.time_ns(), process=None,
+        )
+        assert not hasattr(info, "__dict__")
+
     async def test_is_alive_recovered_process_dead(self, manager):
         """Recovered process (no Popen handle) that is dead."""
         info = ProcessInfo(
             pid=1, port=1, project_id="x", project_path="/x",
-            started_at=datetime.now(timezone.utc), process=None,
+            started_at_ns=time.time_ns(), process=None,
         )
         with patch.object(PreviewManager, "_pid_exists", return_value=False):
             assert manager._is_alive(info) is False
@@ -902,22 +1230,12 @@ class TestIsAlive:
 
 def _mock_port_free():
     """Context manager: mock socket.connect_ex to return non-zero (port free)."""
-    mock_sock = MagicMock()
-    mock_sock.__enter__ = MagicMock(return_value=mock_sock)
-    mock_sock.__exit__ = MagicMock(return_value=False)
-    mock_sock.connect_ex.return_value = 1  # Port free
-
-    return patch("socket.socket", return_value=mock_sock)
+    return patch("socket.socket", return_value=_MOCK_FREE)
 
 
 def _mock_port_in_use():
     """Context manager: mock socket.connect_ex to return 0 (port in use)."""
-    mock_sock = MagicMock()
-    mock_sock.__enter__ = MagicMock(return_value=mock_sock)
-    mock_sock.__exit__ = MagicMock(return_value=False)
-    mock_sock.connect_ex.return_value = 0  # Port in use
-
-    return patch("socket.socket", return_value=mock_sock)
+    return patch("socket.socket", return_value=_MOCK_IN_USE)
 
 
 def _mock_detect_vite():
@@ -926,3 +1244,11 @@ def _mock_detect_vite():
         "src.services.preview_manager.detect_project_type",
         return_value=("npm run dev -- --host 0.0.0.0", 5173, "vite"),
     )
+
+
+@contextmanager
+def _mock_tailscale_cli(path: str | None = "/usr/local/bin/tailscale"):
+    """Context manager: no LocalAPI socket, CLI lookup returns ``path``."""
+    with patch("src.services.preview_manager._query_tailscale_localapi", return_value=None), \
+         patch("shutil.which", return_value=path):
+        yield
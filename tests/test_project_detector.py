@@ -1,14 +1,33 @@
 """Tests for project type detection logic.
 
 Tests src/utils/project_detector.py — the detect_project_type() function.
-Each test creates real files in a temporary directory to simulate project structures.
+Each test creates real files in a fresh case directory to simulate project structures;
+the negative cases that only need an empty or broken tree use pyfakefs's `fs` fixture.
 """
 
+import codecs
 import json
-import os
-import tempfile
+from pathlib import Path
+from unittest.mock import patch
 
-from src.utils.project_detector import detect_project_type
+import pytest
+
+from src.utils import fast_json
+from src.utils.project_detector import clear_package_json_cache, detect_project_type
+
+# Pre-encoded package.json bodies for the parametrized binding test —
+# serialized once at import rather than once per case.
+_PKG_VITE = fast_json.dumps({"scripts": {"dev": "vite"}, "devDependencies": {"vite": "5"}})
+_PKG_NEXT = fast_json.dumps({"scripts": {"dev": "next dev"}, "dependencies": {"next": "14"}})
+_PKG_NUXT = fast_json.dumps({"scripts": {"dev": "nuxi dev"}, "dependencies": {"nuxt": "3"}})
+
+
+@pytest.fixture(autouse=True)
+def _clear_detector_cache():
+    """Keep the package.json parse cache from leaking between tests."""
+    clear_package_json_cache()
+    yield
+    clear_package_json_cache()
 
 
 class TestProjectDetector:
@@ -18,355 +37,421 @@ class TestProjectDetector:
     # Vite
     # -----------------------------------------------------------------
 
-    async def test_detect_vite_project_via_dev_script(self):
+    def test_detect_vite_project_via_dev_script(self, case_dir):
         """Vite detected when scripts.dev contains 'vite'."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-vite-app",
-                "scripts": {"dev": "vite"},
-                "dependencies": {},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-vite-app",
+            "scripts": {"dev": "vite"},
+            "dependencies": {},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "npm run dev -- --host 0.0.0.0"
-            assert port == 5173
-            assert ptype == "vite"
+        assert cmd == "npm run dev -- --host 0.0.0.0"
+        assert port == 5173
+        assert ptype == "vite"
 
-    async def test_detect_vite_project_via_dev_dependency(self):
+    def test_detect_vite_project_via_dev_dependency(self, case_dir):
         """Vite detected when 'vite' is in devDependencies."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-app",
-                "scripts": {"dev": "vite --mode staging"},
-                "devDependencies": {"vite": "^5.0.0"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-app",
+            "scripts": {"dev": "vite --mode staging"},
+            "devDependencies": {"vite": "^5.0.0"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "npm run dev -- --host 0.0.0.0"
-            assert port == 5173
-            assert ptype == "vite"
+        assert cmd == "npm run dev -- --host 0.0.0.0"
+        assert port == 5173
+        assert ptype == "vite"
 
     # -----------------------------------------------------------------
     # Next.js
     # -----------------------------------------------------------------
 
-    async def test_detect_nextjs_project(self):
+    def test_detect_nextjs_project(self, case_dir):
         """Next.js detected when 'next' is in dependencies."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-next-app",
-                "scripts": {"dev": "next dev"},
-                "dependencies": {"next": "14.1.0", "react": "^18"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-next-app",
+            "scripts": {"dev": "next dev"},
+            "dependencies": {"next": "14.1.0", "react": "^18"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "npm run dev -- -H 0.0.0.0"
-            assert port == 3000
-            assert ptype == "nextjs"
+        assert cmd == "npm run dev -- -H 0.0.0.0"
+        assert port == 3000
+        assert ptype == "nextjs"
 
     # -----------------------------------------------------------------
     # CRA (Create React App)
     # -----------------------------------------------------------------
 
-    async def test_detect_cra_project(self):
+    def test_detect_cra_project(self, case_dir):
         """CRA detected when 'react-scripts' is in dependencies."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-cra-app",
-                "scripts": {"start": "react-scripts start"},
-                "dependencies": {"react-scripts": "5.0.1", "react": "^18"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-cra-app",
+            "scripts": {"start": "react-scripts start"},
+            "dependencies": {"react-scripts": "5.0.1", "react": "^18"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "npm start"
-            assert port == 3000
-            assert ptype == "cra"
+        assert cmd == "npm start"
+        assert port == 3000
+        assert ptype == "cra"
 
     # -----------------------------------------------------------------
     # Nuxt
     # -----------------------------------------------------------------
 
-    async def test_detect_nuxt_project(self):
+    def test_detect_nuxt_project(self, case_dir):
         """Nuxt detected when 'nuxt' is in dependencies."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-nuxt-app",
-                "scripts": {"dev": "nuxi dev"},
-                "dependencies": {"nuxt": "^3.10"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-nuxt-app",
+            "scripts": {"dev": "nuxi dev"},
+            "dependencies": {"nuxt": "^3.10"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert port == 3000
-            assert ptype == "nuxt"
-            assert "--host 0.0.0.0" in cmd
+        assert port == 3000
+        assert ptype == "nuxt"
+        assert "--host 0.0.0.0" in cmd
 
     # -----------------------------------------------------------------
     # Generic npm project with dev script
     # -----------------------------------------------------------------
 
-    async def test_detect_generic_npm_project(self):
+    def test_detect_generic_npm_project(self, case_dir):
         """Generic node project with a dev script but no known framework."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "custom-server",
-                "scripts": {"dev": "node server.js"},
-                "dependencies": {"express": "^4"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "custom-server",
+            "scripts": {"dev": "node server.js"},
+            "dependencies": {"express": "^4"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "npm run dev"
-            assert port == 3000
-            assert ptype == "node"
+        assert cmd == "npm run dev"
+        assert port == 3000
+        assert ptype == "node"
 
     # -----------------------------------------------------------------
     # Flask
     # -----------------------------------------------------------------
 
-    async def test_detect_flask_project_via_app_py(self):
+    def test_detect_flask_project_via_app_py(self, case_dir):
         """Flask detected when app.py exists (no package.json)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            _touch(tmpdir, "app.py")
+        _touch(case_dir, "app.py")
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "flask run --host 0.0.0.0"
-            assert port == 5000
-            assert ptype == "flask"
+        assert cmd == "flask run --host 0.0.0.0"
+        assert port == 5000
+        assert ptype == "flask"
 
-    async def test_detect_flask_project_via_wsgi_py(self):
+    def test_detect_flask_project_via_wsgi_py(self, case_dir):
         """Flask detected when wsgi.py exists (no package.json)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            _touch(tmpdir, "wsgi.py")
+        _touch(case_dir, "wsgi.py")
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "flask run --host 0.0.0.0"
-            assert port == 5000
-            assert ptype == "flask"
+        assert cmd == "flask run --host 0.0.0.0"
+        assert port == 5000
+        assert ptype == "flask"
 
     # -----------------------------------------------------------------
     # Django
     # -----------------------------------------------------------------
 
-    async def test_detect_django_project(self):
+    def test_detect_django_project(self, case_dir):
         """Django detected when manage.py exists (no package.json)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            _touch(tmpdir, "manage.py")
+        _touch(case_dir, "manage.py")
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd == "python manage.py runserver 0.0.0.0:8001"
-            assert port == 8001
-            assert ptype == "django"
+        assert cmd == "python manage.py runserver 0.0.0.0:8001"
+        assert port == 8001
+        assert ptype == "django"
 
-    async def test_django_avoids_zurk_port(self):
+    def test_django_avoids_zurk_port(self, case_dir):
         """Django uses port 8001 (not 8000) to avoid ZURK backend conflict."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            _touch(tmpdir, "manage.py")
+        _touch(case_dir, "manage.py")
 
-            _, port, _ = detect_project_type(tmpdir)
+        _, port, _ = detect_project_type(str(case_dir))
 
-            assert port == 8001
+        assert port == 8001
 
     # -----------------------------------------------------------------
     # No detectable project
     # -----------------------------------------------------------------
 
-    async def test_no_detectable_project_type(self):
+    def test_no_detectable_project_type(self, fs):
         """Empty directory returns (None, None, None)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cmd, port, ptype = detect_project_type(tmpdir)
+        fs.create_dir("/proj")
+
+        cmd, port, ptype = detect_project_type("/proj")
 
-            assert cmd is None
-            assert port is None
-            assert ptype is None
+        assert cmd is None
+        assert port is None
+        assert ptype is None
 
-    async def test_directory_with_unrelated_files(self):
+    def test_directory_with_unrelated_files(self, fs):
         """Directory with random files returns (None, None, None)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            _touch(tmpdir, "README.md")
-            _touch(tmpdir, "data.csv")
-            _touch(tmpdir, "requirements.txt")
+        fs.create_file("/proj/README.md")
+        fs.create_file("/proj/data.csv")
+        fs.create_file("/proj/requirements.txt")
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type("/proj")
 
-            assert cmd is None
-            assert port is None
-            assert ptype is None
+        assert cmd is None
+        assert port is None
+        assert ptype is None
 
     # -----------------------------------------------------------------
     # Priority / precedence
     # -----------------------------------------------------------------
 
-    async def test_vite_takes_priority_over_django(self):
-        """When both package.json (Vite) AND manage.py exist, Vite wins."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "fullstack-app",
-                "scripts": {"dev": "vite"},
-                "devDependencies": {"vite": "^5.0.0"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
-            _touch(tmpdir, "manage.py")
-
-            cmd, port, ptype = detect_project_type(tmpdir)
-
-            assert ptype == "vite"
-            assert port == 5173
-
-    async def test_nextjs_takes_priority_over_flask(self):
-        """When both package.json (Next.js) AND app.py exist, Next.js wins."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "fullstack",
-                "scripts": {"dev": "next dev"},
-                "dependencies": {"next": "14.0.0"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
-            _touch(tmpdir, "app.py")
-
-            cmd, port, ptype = detect_project_type(tmpdir)
-
-            assert ptype == "nextjs"
-            assert port == 3000
-
-    async def test_vite_detected_over_nextjs_when_both_present(self):
-        """When deps have both vite and next, vite (higher priority) wins."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "confused-app",
-                "scripts": {"dev": "vite"},
-                "dependencies": {"next": "14.0.0"},
-                "devDependencies": {"vite": "^5.0.0"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
-
-            _, port, ptype = detect_project_type(tmpdir)
-
-            assert ptype == "vite"
-            assert port == 5173
+    @pytest.mark.parametrize(
+        "pkg,extra_file,expected_type,expected_port",
+        [
+            # package.json (Vite) AND manage.py: Vite wins
+            (
+                {
+                    "name": "fullstack-app",
+                    "scripts": {"dev": "vite"},
+                    "devDependencies": {"vite": "^5.0.0"},
+                },
+                "manage.py",
+                "vite",
+                5173,
+            ),
+            # package.json (Next.js) AND app.py: Next.js wins
+            (
+                {
+                    "name": "fullstack",
+                    "scripts": {"dev": "next dev"},
+                    "dependencies": {"next": "14.0.0"},
+                },
+                "app.py",
+                "nextjs",
+                3000,
+            ),
+            # deps have both vite and next: vite (higher priority) wins
+            (
+                {
+                    "name": "confused-app",
+                    "scripts": {"dev": "vite"},
+                    "dependencies": {"next": "14.0.0"},
+                    "devDependencies": {"vite": "^5.0.0"},
+                },
+                None,
+                "vite",
+                5173,
+            ),
+        ],
+        ids=["vite-over-django", "nextjs-over-flask", "vite-over-nextjs"],
+    )
+    def test_precedence(self, case_dir, pkg, extra_file, expected_type, expected_port):
+        """The higher-priority framework wins when several markers are present."""
+        _write_json(case_dir, "package.json", pkg)
+        if extra_file:
+            _touch(case_dir, extra_file)
+
+        _, port, ptype = detect_project_type(str(case_dir))
+
+        assert ptype == expected_type
+        assert port == expected_port
 
     # -----------------------------------------------------------------
     # Edge cases
     # -----------------------------------------------------------------
 
-    async def test_package_json_no_scripts(self):
+    def test_package_json_no_scripts(self, case_dir):
         """package.json without scripts section does not match node frameworks."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {"name": "lib-only", "dependencies": {"lodash": "^4"}}
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {"name": "lib-only", "dependencies": {"lodash": "^4"}}
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd is None
-            assert port is None
-            assert ptype is None
+        assert cmd is None
+        assert port is None
+        assert ptype is None
 
-    async def test_package_json_empty_dev_script(self):
+    def test_package_json_empty_dev_script(self, case_dir):
         """package.json with empty dev script does not match generic node."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "no-dev",
-                "scripts": {"test": "jest"},
-                "dependencies": {"jest": "^29"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "no-dev",
+            "scripts": {"test": "jest"},
+            "dependencies": {"jest": "^29"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert cmd is None
-            assert port is None
-            assert ptype is None
+        assert cmd is None
+        assert port is None
+        assert ptype is None
 
-    async def test_malformed_package_json(self):
+    def test_malformed_package_json(self, fs):
         """Malformed package.json returns (None, None, None)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = os.path.join(tmpdir, "package.json")
-            with open(path, "w") as f:
-                f.write("{not valid json")
+        fs.create_file("/proj/package.json", contents='{"scripts": {"dev": "vite"')
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type("/proj")
 
-            assert cmd is None
-            assert port is None
-            assert ptype is None
+        assert cmd is None
+        assert port is None
+        assert ptype is None
 
-    async def test_all_commands_bind_to_0_0_0_0(self):
-        """All detected commands must bind to 0.0.0.0 for network access."""
-        test_cases = [
-            # (package_json_content, marker_file, expected_type)
-            ({"scripts": {"dev": "vite"}, "devDependencies": {"vite": "5"}}, None, "vite"),
-            ({"scripts": {"dev": "next dev"}, "dependencies": {"next": "14"}}, None, "nextjs"),
-            ({"scripts": {"dev": "nuxi dev"}, "dependencies": {"nuxt": "3"}}, None, "nuxt"),
+    @pytest.mark.parametrize(
+        "pkg_bytes,marker_file,expected_type",
+        [
+            (_PKG_VITE, None, "vite"),
+            (_PKG_NEXT, None, "nextjs"),
+            (_PKG_NUXT, None, "nuxt"),
             (None, "app.py", "flask"),
             (None, "manage.py", "django"),
-        ]
-
-        for pkg_content, marker_file, expected_type in test_cases:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                if pkg_content:
-                    _write_json(tmpdir, "package.json", pkg_content)
-                if marker_file:
-                    _touch(tmpdir, marker_file)
-
-                cmd, _, ptype = detect_project_type(tmpdir)
-
-                assert ptype == expected_type, f"Failed for type {expected_type}"
-                assert cmd is not None, f"No command for {expected_type}"
-                # CRA is special: uses HOST env var, not --host flag.
-                # All others should have 0.0.0.0 in the command itself.
-                if ptype != "cra":
-                    assert "0.0.0.0" in cmd, (
-                        f"{expected_type} command missing 0.0.0.0: {cmd}"
-                    )
-
-    async def test_vite_script_already_has_host(self):
+        ],
+    )
+    def test_all_commands_bind_to_0_0_0_0(
+        self, case_dir, pkg_bytes, marker_file, expected_type
+    ):
+        """All detected commands must bind to 0.0.0.0 for network access."""
+        if pkg_bytes:
+            (case_dir / "package.json").write_bytes(pkg_bytes)
+        if marker_file:
+            _touch(case_dir, marker_file)
+
+        cmd, _, ptype = detect_project_type(str(case_dir))
+
+        assert ptype == expected_type
+        assert cmd is not None
+        # CRA is special: uses HOST env var, not --host flag.
+        # All others should have 0.0.0.0 in the command itself.
+        if ptype != "cra":
+            assert "0.0.0.0" in cmd
+
+    def test_vite_script_already_has_host(self, case_dir):
         """If dev script already has --host, don't append it again."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-vite-app",
-                "scripts": {"dev": "vite --host 0.0.0.0"},
-                "devDependencies": {"vite": "^5.0.0"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-vite-app",
+            "scripts": {"dev": "vite --host 0.0.0.0"},
+            "devDependencies": {"vite": "^5.0.0"},
+        }
+        _write_json(case_dir, "package.json", pkg)
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert ptype == "vite"
-            assert cmd == "npm run dev"
-            assert cmd.count("--host") == 0  # Not doubled
+        assert ptype == "vite"
+        assert cmd == "npm run dev"
+        assert cmd.count("--host") == 0  # Not doubled
 
-    async def test_nextjs_script_already_has_host(self):
+    def test_nextjs_script_already_has_host(self, case_dir):
         """If dev script already has -H 0.0.0.0, don't append it again."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            pkg = {
-                "name": "my-next-app",
-                "scripts": {"dev": "next dev -H 0.0.0.0 --turbopack"},
-                "dependencies": {"next": "15.0.0"},
-            }
-            _write_json(tmpdir, "package.json", pkg)
+        pkg = {
+            "name": "my-next-app",
+            "scripts": {"dev": "next dev -H 0.0.0.0 --turbopack"},
+            "dependencies": {"next": "15.0.0"},
+        }
+        _write_json(case_dir, "package.json", pkg)
+
+        cmd, port, ptype = detect_project_type(str(case_dir))
+
+        assert ptype == "nextjs"
+        assert cmd == "npm run dev"
+        assert "-H" not in cmd  # Not doubled
+
+    def test_marker_names_must_be_files(self, case_dir):
+        """A directory named like a marker file doesn't count."""
+        (case_dir / "manage.py").mkdir()
+        (case_dir / "package.json").mkdir()
+
+        assert detect_project_type(str(case_dir)) == (None, None, None)
+
+    # -----------------------------------------------------------------
+    # package.json cache
+    # -----------------------------------------------------------------
+
+    def test_unchanged_package_json_is_parsed_once(self, case_dir):
+        """Repeat detections on an untouched package.json hit the cache."""
+        _write_json(case_dir, "package.json", {"scripts": {"dev": "vite"}})
+
+        with patch(
+            "src.utils.project_detector.json.loads", wraps=json.loads
+        ) as loads:
+            first = detect_project_type(str(case_dir))
+            second = detect_project_type(str(case_dir))
+
+        assert first == second
+        assert loads.call_count == 1
+
+    def test_edited_package_json_is_reparsed(self, case_dir):
+        """A new mtime/size invalidates the cached parse."""
+        _write_json(case_dir, "package.json", {"scripts": {"dev": "vite"}})
+        assert detect_project_type(str(case_dir))[2] == "vite"
+
+        _write_json(case_dir, "package.json", {
+            "scripts": {"dev": "next dev"},
+            "dependencies": {"next": "^14.0.0"},
+        })
+
+        assert detect_project_type(str(case_dir))[2] == "nextjs"
+
+    def test_malformed_package_json_is_negatively_cached(self, case_dir):
+        """A broken package.json is parsed once, then served as a cached miss."""
+        (case_dir / "package.json").write_bytes(b'{"scripts": {"dev": "vite" broken')
+
+        with patch(
+            "src.utils.project_detector.json.loads", wraps=json.loads
+        ) as loads:
+            assert detect_project_type(str(case_dir)) == (None, None, None)
+            assert detect_project_type(str(case_dir)) == (None, None, None)
+
+        assert loads.call_count == 1
+
+    @pytest.mark.parametrize("raw", [b"", b"   \n", b"not json at all", b'["vite"]'])
+    def test_non_object_package_json_rejected_before_parse(self, case_dir, raw):
+        """Content that can't open a JSON object never reaches json.loads."""
+        (case_dir / "package.json").write_bytes(raw)
+
+        with patch(
+            "src.utils.project_detector.json.loads", wraps=json.loads
+        ) as loads:
+            assert detect_project_type(str(case_dir)) == (None, None, None)
+
+        assert loads.call_count == 0
+
+    def test_package_json_with_utf8_bom(self, case_dir):
+        """A leading UTF-8 BOM is tolerated, as json.loads tolerates it."""
+        (case_dir / "package.json").write_bytes(
+            codecs.BOM_UTF8 + fast_json.dumps({"scripts": {"dev": "vite"}})
+        )
+
+        assert detect_project_type(str(case_dir))[2] == "vite"
+
+    def test_package_json_without_npm_markers_is_not_parsed(self, case_dir):
+        """No framework token and no dev script: skip json.loads entirely."""
+        _write_json(case_dir, "package.json", {"name": "scripts-only", "private": True})
+        _touch(case_dir, "manage.py")
 
-            cmd, port, ptype = detect_project_type(tmpdir)
+        with patch(
+            "src.utils.project_detector.json.loads", wraps=json.loads
+        ) as loads:
+            cmd, port, ptype = detect_project_type(str(case_dir))
 
-            assert ptype == "nextjs"
-            assert cmd == "npm run dev"
-            assert "-H" not in cmd  # Not doubled
+        assert loads.call_count == 0
+        assert ptype == "django"
 
-    async def test_nonexistent_path(self):
+    def test_nonexistent_path(self, fs):
         """Nonexistent path returns (None, None, None) rather than crashing."""
-        cmd, port, ptype = detect_project_type("/tmp/definitely-not-a-real-path-xyz")
+        cmd, port, ptype = detect_project_type("/definitely-not-a-real-path-xyz")
 
         assert cmd is None
         assert port is None
@@ -380,13 +465,9 @@ class TestProjectDetector:
 
 def _write_json(directory: str, filename: str, data: dict) -> None:
     """Write a JSON file into a directory."""
-    path = os.path.join(directory, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f)
+    Path(directory, filename).write_bytes(fast_json.dumps(data))
 
 
 def _touch(directory: str, filename: str) -> None:
     """Create an empty file in a directory."""
-    path = os.path.join(directory, filename)
-    with open(path, "w") as f:
-        pass
+    Path(directory, filename).touch()
@@ -1,22 +1,38 @@
 """Tests for Claude Code session discovery utility."""
 
 import json
+import mmap
 import os
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from src.utils import fast_json, session_discovery
 from src.utils.session_discovery import (
     ExternalSession,
+    clear_session_cache,
     encode_project_path,
     discover_session,
+    discover_session_from_bytes,
     discover_sessions,
+    _count_entries,
+    _iter_marked_lines,
     _parse_metadata_fields,
     _extract_first_user_message,
+    _scan_session,
     CLAUDE_PROJECTS_DIR,
 )
 
 
+@pytest.fixture(autouse=True)
+def _fresh_session_cache():
+    """Don't let one test's parsed transcripts answer for another's."""
+    clear_session_cache()
+    yield
+    clear_session_cache()
+
+
 # =============================================================================
 # encode_project_path
 # =============================================================================
@@ -43,6 +59,13 @@ class TestEncodeProjectPath:
     def test_deeply_nested(self):
         assert encode_project_path("/a/b/c/d/e/f") == "-a-b-c-d-e-f"
 
+    def test_repeat_calls_hit_cache(self):
+        encode_project_path.cache_clear()
+        first = encode_project_path("/Users/mike/cached")
+        second = encode_project_path("/Users/mike/cached")
+        assert first == second == "-Users-mike-cached"
+        assert encode_project_path.cache_info().hits == 1
+
 
 # =============================================================================
 # Helpers
@@ -54,7 +77,7 @@ def _make_jsonl_entry(
     session_id: str = "test-session-1",
     timestamp: str = "2026-01-15T10:00:00.000Z",
     **extra,
-) -> str:
+) -> dict:
     """Create a single JSONL entry."""
     entry = {
         "type": entry_type,
@@ -64,29 +87,49 @@ def _make_jsonl_entry(
         "parentUuid": None,
         **extra,
     }
-    return json.dumps(entry)
+    return entry
+
+
+# Shared assistant entry; _make_assistant_entry shallow-copies it and only
+# swaps the per-entry fields, so nothing here is ever mutated.
+_ASSISTANT_TEMPLATE = {
+    "type": "assistant",
+    "sessionId": "test-session-1",
+    "timestamp": "2026-01-15T10:05:00.000Z",
+    "uuid": "uuid-2",
+    "parentUuid": "uuid-1",
+    "message": {
+        "model": "claude-opus-4-6",
+        "id": "msg_123",
+        "type": "message",
+        "role": "assistant",
+        "content": [{"type": "text", "text": "Hello!"}],
+        "usage": {"input_tokens": 100, "output_tokens": 50},
+    },
+}
 
 
 def _make_assistant_entry(
     session_id: str = "test-session-1",
     timestamp: str = "2026-01-15T10:05:00.000Z",
     model: str = "claude-opus-4-6",
-) -> str:
-    return json.dumps({
-        "type": "assistant",
-        "sessionId": session_id,
-        "timestamp": timestamp,
-        "uuid": "uuid-2",
-        "parentUuid": "uuid-1",
-        "message": {
-            "model": model,
-            "id": "msg_123",
-            "type": "message",
-            "role": "assistant",
-            "content": [{"type": "text", "text": "Hello!"}],
-            "usage": {"input_tokens": 100, "output_tokens": 50},
-        },
-    })
+) -> dict:
+    entry = _ASSISTANT_TEMPLATE.copy()
+    entry["sessionId"] = session_id
+    entry["timestamp"] = timestamp
+    if model != _ASSISTANT_TEMPLATE["message"]["model"]:
+        entry["message"] = {**_ASSISTANT_TEMPLATE["message"], "model": model}
+    return entry
+
+
+def _jsonl_bytes(entries: list[dict]) -> bytes:
+    """Serialize entries into one JSONL buffer, one JSON object per line."""
+    return b"".join(fast_json.dumps(entry) + b"\n" for entry in entries)
+
+
+def _write_jsonl(file_path: Path, entries: list[dict]) -> None:
+    """Serialize entries and write them to file_path in one go."""
+    file_path.write_bytes(_jsonl_bytes(entries))
 
 
 def _create_session_file(
@@ -100,7 +143,7 @@ def _create_session_file(
     create_subagents: bool = False,
 ) -> Path:
     """Create a realistic JSONL session file."""
-    lines = []
+    entries = []
 
     # First entry (user)
     extra = {}
@@ -108,7 +151,7 @@ def _create_session_file(
         extra["slug"] = slug
     if version:
         extra["version"] = version
-    lines.append(_make_jsonl_entry(
+    entries.append(_make_jsonl_entry(
         entry_type="user",
         session_id=session_id,
         timestamp="2026-01-15T10:00:00.000Z",
@@ -117,34 +160,35 @@ def _create_session_file(
 
     # Mix of user and assistant entries
     for i in range(num_assistant):
-        lines.append(_make_assistant_entry(
+        entries.append(_make_assistant_entry(
             session_id=session_id,
             timestamp=f"2026-01-15T10:{10 + i:02d}:00.000Z",
             model=model,
         ))
 
     for i in range(num_user - 1):  # -1 because first entry is user
-        lines.append(_make_jsonl_entry(
+        entries.append(_make_jsonl_entry(
             entry_type="user",
             session_id=session_id,
             timestamp=f"2026-01-15T10:{20 + i:02d}:00.000Z",
         ))
 
     # Last entry
-    lines.append(_make_jsonl_entry(
+    entries.append(_make_jsonl_entry(
         entry_type="user",
         session_id=session_id,
         timestamp="2026-01-15T11:30:00.000Z",
     ))
 
     file_path = directory / f"{session_id}.jsonl"
-    file_path.write_text("\n".join(lines) + "\n")
+    _write_jsonl(file_path, entries)
 
     if create_subagents:
         subagent_dir = directory / session_id / "subagents"
         subagent_dir.mkdir(parents=True)
-        (subagent_dir / "agent-1.jsonl").write_text(
-            _make_jsonl_entry(entry_type="user", session_id="sub-1") + "\n"
+        _write_jsonl(
+            subagent_dir / "agent-1.jsonl",
+            [_make_jsonl_entry(entry_type="user", session_id="sub-1")],
         )
 
     return file_path
@@ -171,6 +215,16 @@ class TestDiscoverSession:
         assert session.user_messages >= 3
         assert session.assistant_messages >= 5
 
+    def test_uuid_filename_is_the_session_id(self, tmp_path: Path):
+        """A UUID-shaped filename wins over the first entry's sessionId."""
+        session_id = "0b5e3c2a-1d4f-4e6a-9b7c-8d2e1f0a3b4c"
+        file_path = tmp_path / f"{session_id}.jsonl"
+        _write_jsonl(file_path, [_make_jsonl_entry(session_id="something-else")])
+
+        session = discover_session(file_path)
+        assert session is not None
+        assert session.session_id == session_id
+
     def test_no_slug(self, tmp_path: Path):
         file_path = _create_session_file(tmp_path, slug=None)
         session = discover_session(file_path)
@@ -189,6 +243,13 @@ class TestDiscoverSession:
         assert session is not None
         assert session.has_subagents is False
 
+    def test_empty_subagents_dir(self, tmp_path: Path):
+        file_path = _create_session_file(tmp_path)
+        (tmp_path / file_path.stem / "subagents").mkdir(parents=True)
+        session = discover_session(file_path)
+        assert session is not None
+        assert session.has_subagents is False
+
     def test_empty_file(self, tmp_path: Path):
         file_path = tmp_path / "empty.jsonl"
         file_path.write_text("")
@@ -201,6 +262,29 @@ class TestDiscoverSession:
         session = discover_session(file_path)
         assert session is None
 
+    def test_from_bytes_matches_file(self, tmp_path: Path):
+        """The in-memory entry point gives the same session as reading the file."""
+        file_path = _create_session_file(tmp_path)
+        from_bytes = discover_session_from_bytes(file_path.read_bytes(), file_path)
+        assert from_bytes == discover_session(file_path)
+
+    def test_from_bytes_empty_buffer(self):
+        assert discover_session_from_bytes(b"", Path("empty.jsonl")) is None
+
+    def test_invalid_utf8_in_first_and_last_lines(self):
+        """A stray undecodable byte doesn't cost the line its metadata."""
+        buf = (
+            b'{"type":"user","sessionId":"s1","slug":"caf\xe9","version":"1.0",'
+            b'"timestamp":"2025-01-01T10:00:00Z","message":{"content":"hi"}}\n'
+            b'{"type":"assistant","timestamp":"2025-01-01T10:05:00Z",'
+            b'"message":{"content":[{"type":"text","text":"caf\xe9"}]}}\n'
+        )
+        session = discover_session_from_bytes(buf, Path("s1.jsonl"))
+        assert session is not None
+        assert session.started_at == "2025-01-01T10:00:00Z"
+        assert session.claude_code_version == "1.0"
+        assert session.ended_at == "2025-01-01T10:05:00Z"
+
     def test_model_detection(self, tmp_path: Path):
         file_path = _create_session_file(
             tmp_path,
@@ -211,6 +295,40 @@ class TestDiscoverSession:
         assert session is not None
         assert session.model == "claude-sonnet-4-5-20250929"
 
+    def test_model_from_later_assistant_entry(self, tmp_path: Path):
+        """Assistant entries without a model are skipped until one has it."""
+        entries = [_make_jsonl_entry(), *[_make_jsonl_entry() for _ in range(20)]]
+        entries.append({"type": "assistant", "message": {"content": []}})
+        entries.append(_make_assistant_entry(model="claude-haiku-4-5"))
+        file_path = tmp_path / "late-model.jsonl"
+        _write_jsonl(file_path, entries)
+
+        session = discover_session(file_path)
+        assert session is not None
+        assert session.model == "claude-haiku-4-5"
+
+    def test_ended_at_from_last_line_of_long_file(self, tmp_path: Path):
+        """ended_at comes from the final entry even when it's past a truncated tail line."""
+        session_id = "tail-test-1234-5678-abcd-123456789abc"
+        entries = [
+            _make_jsonl_entry(session_id=session_id, padding="x" * 2000)
+            for _ in range(10)
+        ]
+        entries.append(
+            _make_assistant_entry(
+                session_id=session_id, timestamp="2026-01-15T11:30:00.000Z"
+            )
+        )
+        file_path = tmp_path / f"{session_id}.jsonl"
+        file_path.write_bytes(
+            b"\n".join(fast_json.dumps(e) for e in entries) + b"\n\n"
+        )
+
+        session = discover_session(file_path)
+        assert session is not None
+        assert session.started_at == "2026-01-15T10:00:00.000Z"
+        assert session.ended_at == "2026-01-15T11:30:00.000Z"
+
     def test_total_entries(self, tmp_path: Path):
         file_path = _create_session_file(
             tmp_path,
@@ -228,6 +346,134 @@ class TestDiscoverSession:
         session = discover_session(file_path)
         assert session is None
 
+    def test_parses_only_the_stat_snapshot(self, tmp_path: Path):
+        """Bytes appended after the stat aren't read; the size matches the stat."""
+        file_path = _create_session_file(tmp_path)
+        stat = os.stat(file_path)
+        with open(file_path, "ab") as f:
+            f.write(fast_json.dumps(_make_assistant_entry()) + b"\n")
+
+        session = discover_session(file_path, stat)
+        assert session is not None
+        assert session.file_size_bytes == stat.st_size
+
+    def test_truncated_after_stat(self, tmp_path: Path):
+        """A file that shrank below its stat size is skipped, not half-read."""
+        file_path = _create_session_file(tmp_path)
+        stat = os.stat(file_path)
+        file_path.write_bytes(b"{}\n")
+
+        assert discover_session(file_path, stat) is None
+
+    def test_live_file_is_read_not_mapped(self, tmp_path: Path):
+        """A just-written transcript is copied, so truncation can't fault a mapping."""
+        file_path = _create_session_file(tmp_path)
+        with patch("mmap.mmap", wraps=mmap.mmap) as mmap_mock:
+            session = discover_session(file_path)
+        assert session is not None
+        mmap_mock.assert_not_called()
+
+    def test_settled_file_is_mapped(self, tmp_path: Path):
+        file_path = _create_session_file(tmp_path)
+        os.utime(file_path, (1_700_000_000, 1_700_000_000))
+        with patch("mmap.mmap", wraps=mmap.mmap) as mmap_mock:
+            session = discover_session(file_path)
+        assert session is not None
+        mmap_mock.assert_called_once()
+
+    def test_settled_file_truncated_after_stat(self, tmp_path: Path):
+        file_path = _create_session_file(tmp_path)
+        os.utime(file_path, (1_700_000_000, 1_700_000_000))
+        stat = os.stat(file_path)
+        file_path.write_bytes(b"{}\n")
+
+        assert discover_session(file_path, stat) is None
+
+    def test_parse_errors_are_not_swallowed(self, tmp_path: Path):
+        """Only the mmap of a truncated file maps to None; parser bugs surface."""
+        file_path = _create_session_file(tmp_path)
+        with patch(
+            "src.utils.session_discovery.discover_session_from_bytes",
+            side_effect=ValueError("parser bug"),
+        ), pytest.raises(ValueError, match="parser bug"):
+            discover_session(file_path)
+
+    def test_unchanged_file_is_served_from_cache(self, tmp_path: Path):
+        file_path = _create_session_file(tmp_path)
+        with patch(
+            "src.utils.session_discovery.discover_session_from_bytes",
+            wraps=session_discovery.discover_session_from_bytes,
+        ) as parse:
+            first = discover_session(file_path)
+            second = discover_session(file_path)
+        assert second is first
+        assert parse.call_count == 1
+
+    def test_appended_file_is_reparsed(self, tmp_path: Path):
+        file_path = _create_session_file(tmp_path, num_user=1, num_assistant=1)
+        before = discover_session(file_path)
+        with open(file_path, "ab") as f:
+            f.write(fast_json.dumps(_make_assistant_entry()) + b"\n")
+        after = discover_session(file_path)
+        assert after.total_entries == before.total_entries + 1
+
+
+# =============================================================================
+# _iter_marked_lines
+# =============================================================================
+
+
+class _CountingBytes(bytes):
+    """bytes that records how often each needle is searched for."""
+
+    def find(self, sub, *args):
+        self.finds[sub] = self.finds.get(sub, 0) + 1
+        return super().find(sub, *args)
+
+
+class TestIterMarkedLines:
+    def test_yields_marked_lines_in_order(self):
+        buf = b'{"a":1}\n{"m":"x"}\n{"b":2}\n{"n":"y"}\n{"m":"z"}'
+        lines = list(_iter_marked_lines(buf, (b'"m"', b'"n"')))
+        assert lines == [b'{"m":"x"}\n', b'{"n":"y"}\n', b'{"m":"z"}']
+
+    def test_exhausted_marker_is_not_searched_again(self):
+        """A marker with no hits left costs one search, not one per line."""
+        buf = _CountingBytes(b'{"late":1}\n' + b'{"hit":1}\n' * 1000)
+        buf.finds = {}
+        lines = list(_iter_marked_lines(buf, (b'"hit"', b'"late"')))
+        assert len(lines) == 1001
+        # One initial search, one after the single line it was found on
+        assert buf.finds[b'"late"'] == 2
+
+
+# =============================================================================
+# _count_entries
+# =============================================================================
+
+
+class TestCountEntries:
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b'{"type":"user"}\n{"type":"assistant"}\n',
+            b'{"type": "user"}\n{"type": "assistant"}',
+            b'{"type":"user"}\n\n   \n{"type":"assistant"}\n',
+            b'{"type":"progress","data":{"message":{"type":"user"}}}\n{"type":"user"}\n',
+            b'{"type":"assistant","x":{"type":"user"}}\n',
+            b'{"type":"summary"}\n',
+        ],
+        ids=["compact", "spaced", "blank-lines", "embedded-message", "both-markers", "no-markers"],
+    )
+    def test_buffer_counts_match_streamed_counts(self, tmp_path: Path, data: bytes):
+        """Bulk-counting a buffer or mmap agrees with the line-by-line count of the file."""
+        file_path = tmp_path / "test.jsonl"
+        file_path.write_bytes(data)
+        streamed = _count_entries(file_path)
+        assert _count_entries(data) == streamed
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            assert _count_entries(mm) == streamed
+
 
 # =============================================================================
 # discover_sessions (project-level scan)
@@ -255,6 +501,18 @@ class TestDiscoverSessions:
         result = discover_sessions("/Users/mike/nonexistent-project")
         assert result == []
 
+    def test_project_entry_is_a_file(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        """Returns empty list when the encoded path exists but isn't a directory."""
+        claude_dir = tmp_path / ".claude" / "projects"
+        claude_dir.mkdir(parents=True)
+        (claude_dir / "-not-a-dir").write_bytes(b"")
+        monkeypatch.setattr(
+            "src.utils.session_discovery.CLAUDE_PROJECTS_DIR",
+            claude_dir,
+        )
+        result = discover_sessions("/not/a/dir")
+        assert result == []
+
     def test_discovers_multiple_sessions(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
         """Finds all JSONL files in the project directory."""
         claude_dir = tmp_path / ".claude" / "projects"
@@ -286,6 +544,28 @@ class TestDiscoverSessions:
         slugs = {s.slug for s in result}
         assert slugs == {"alpha-session", "beta-session", "gamma-session"}
 
+    def test_caps_to_most_recent_files(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+        """Only the MAX_FILES_PER_PROJECT most recently modified files are scanned."""
+        claude_dir = tmp_path / ".claude" / "projects"
+        project_dir = claude_dir / "-cap-test"
+        project_dir.mkdir(parents=True)
+        monkeypatch.setattr(
+            "src.utils.session_discovery.CLAUDE_PROJECTS_DIR",
+            claude_dir,
+        )
+        monkeypatch.setattr("src.utils.session_discovery.MAX_FILES_PER_PROJECT", 2)
+
+        for i, sid in enumerate(["stale", "recent", "newest"]):
+            path = _create_session_file(
+                project_dir,
+                session_id=f"{sid}-sess-1234-5678-abcd-123456789abc",
+                slug=f"{sid}-slug",
+            )
+            os.utime(path, (1_700_000_000 + i, 1_700_000_000 + i))
+
+        result = discover_sessions("/cap/test")
+        assert {s.slug for s in result} == {"recent-slug", "newest-slug"}
+
     def test_sorted_newest_first(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
         """Sessions are sorted by started_at descending."""
         claude_dir = tmp_path / ".claude" / "projects"
@@ -300,14 +580,13 @@ class TestDiscoverSessions:
         # so we need to override timestamps manually
         for i, sid in enumerate(["old", "mid", "new"]):
             full_id = f"{sid}-session-1234-5678-abcd-123456789abc"
-            entry = json.dumps({
+            _write_jsonl(project_dir / f"{full_id}.jsonl", [{
                 "type": "user",
                 "sessionId": full_id,
                 "timestamp": f"2026-0{i + 1}-01T10:00:00.000Z",
                 "slug": f"{sid}-slug",
                 "version": "2.1.33",
-            })
-            (project_dir / f"{full_id}.jsonl").write_text(entry + "\n")
+            }])
 
         result = discover_sessions("/sort/test")
         assert len(result) == 3
@@ -329,7 +608,7 @@ class TestDiscoverSessions:
             project_dir,
             session_id="good-session-1234-5678-abcd-123456789abc",
         )
-        (project_dir / "empty-session.jsonl").write_text("")
+        (project_dir / "empty-session.jsonl").write_bytes(b"")
 
         result = discover_sessions("/skip/test")
         assert len(result) == 1
@@ -350,9 +629,9 @@ class TestDiscoverSessions:
             session_id="valid-sess-1234-5678-abcd-123456789abc",
         )
         # Create non-JSONL files that should be ignored
-        (project_dir / "notes.txt").write_text("not a session")
+        (project_dir / "notes.txt").write_bytes(b"not a session")
         (project_dir / "memory").mkdir(exist_ok=True)
-        (project_dir / "memory" / "MEMORY.md").write_text("# Memory")
+        (project_dir / "memory" / "MEMORY.md").write_bytes(b"# Memory")
 
         result = discover_sessions("/ignore/test")
         assert len(result) == 1
@@ -401,55 +680,51 @@ class TestLiveDiscovery:
 class TestParseMetadataFields:
     """Tests for the _parse_metadata_fields helper."""
 
-    def test_metadata_on_first_line(self, tmp_path: Path):
+    def test_metadata_on_first_line(self):
         """Fields found on line 1 are returned."""
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text(json.dumps({
+        data = (json.dumps({
             "type": "user",
             "slug": "first-slug",
             "cwd": "/home/user/project",
             "gitBranch": "main",
-        }) + "\n")
+        }) + "\n").encode()
 
-        result = _parse_metadata_fields(file_path)
+        result = _parse_metadata_fields(data)
         assert result["slug"] == "first-slug"
         assert result["cwd"] == "/home/user/project"
         assert result["gitBranch"] == "main"
 
-    def test_metadata_on_later_lines(self, tmp_path: Path):
+    def test_metadata_on_later_lines(self):
         """Fields on lines 2-3 are found when line 1 is file-history-snapshot."""
         lines = [
             json.dumps({"type": "file-history-snapshot", "sessionId": "s1"}),
             json.dumps({"type": "user", "slug": "later-slug", "cwd": "/opt/project"}),
             json.dumps({"type": "user", "gitBranch": "feature-x"}),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _parse_metadata_fields(file_path)
+        result = _parse_metadata_fields(data)
         assert result["slug"] == "later-slug"
         assert result["cwd"] == "/opt/project"
         assert result["gitBranch"] == "feature-x"
 
-    def test_missing_fields_returns_partial(self, tmp_path: Path):
+    def test_missing_fields_returns_partial(self):
         """Only found fields are present in the result dict."""
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text(json.dumps({
+        data = (json.dumps({
             "type": "user",
             "slug": "only-slug",
-        }) + "\n")
+        }) + "\n").encode()
 
-        result = _parse_metadata_fields(file_path)
+        result = _parse_metadata_fields(data)
         assert result["slug"] == "only-slug"
         assert "cwd" not in result
         assert "gitBranch" not in result
 
-    def test_empty_file(self, tmp_path: Path):
+    def test_empty_file(self):
         """Empty file returns empty dict."""
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("")
+        data = b""
 
-        result = _parse_metadata_fields(file_path)
+        result = _parse_metadata_fields(data)
         assert result == {}
 
     def test_nonexistent_file(self, tmp_path: Path):
@@ -458,16 +733,68 @@ class TestParseMetadataFields:
         result = _parse_metadata_fields(file_path)
         assert result == {}
 
-    def test_first_value_wins(self, tmp_path: Path):
+    def test_stops_early_once_something_found(self):
+        """Lines past METADATA_EARLY_EXIT_LINES aren't read once a field is found."""
+        lines = [json.dumps({"type": "user", "slug": "early"})]
+        lines += [json.dumps({"type": "assistant"})] * 5
+        lines.append(json.dumps({"type": "user", "gitBranch": "too-late"}))
+        data = ("\n".join(lines) + "\n").encode()
+
+        result = _parse_metadata_fields(data)
+        assert result == {"slug": "early"}
+
+    def test_keeps_scanning_when_nothing_found_yet(self):
+        """Without any early field, the scan continues up to METADATA_SCAN_LINES."""
+        lines = [json.dumps({"type": "file-history-snapshot"})] * 7
+        lines.append(json.dumps({"type": "user", "cwd": "/late/cwd"}))
+        data = ("\n".join(lines) + "\n").encode()
+
+        result = _parse_metadata_fields(data)
+        assert result == {"cwd": "/late/cwd"}
+
+    def test_nested_key_does_not_shadow_top_level(self):
+        """A 'cwd' inside a nested object isn't mistaken for the entry's own."""
+        data = (json.dumps({
+            "type": "user",
+            "toolUseResult": {"cwd": "/nested/tool/cwd"},
+            "cwd": "/real/cwd",
+        }) + "\n").encode()
+
+        result = _parse_metadata_fields(data)
+        assert result["cwd"] == "/real/cwd"
+
+    def test_escaped_values_are_decoded(self):
+        """JSON escapes in extracted values are decoded like json.loads would."""
+        data = (json.dumps({
+            "type": "user",
+            "cwd": "C:\\Users\\me \"quoted\"",
+            "slug": "caf\u00e9-slug",
+        }) + "\n").encode()
+
+        result = _parse_metadata_fields(data)
+        assert result["cwd"] == 'C:\\Users\\me "quoted"'
+        assert result["slug"] == "caf\u00e9-slug"
+
+    def test_accepts_in_memory_buffer(self, tmp_path: Path):
+        """A bytes buffer of the file gives the same result as its path."""
+        lines = [
+            json.dumps({"type": "file-history-snapshot"}),
+            json.dumps({"type": "user", "slug": "buf-slug", "cwd": "/buf"}),
+        ]
+        file_path = tmp_path / "test.jsonl"
+        file_path.write_text("\n".join(lines))  # no trailing newline
+
+        assert _parse_metadata_fields(file_path.read_bytes()) == _parse_metadata_fields(file_path)
+
+    def test_first_value_wins(self):
         """If slug appears on multiple lines, the first occurrence wins."""
         lines = [
             json.dumps({"type": "user", "slug": "first"}),
             json.dumps({"type": "user", "slug": "second"}),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _parse_metadata_fields(file_path)
+        result = _parse_metadata_fields(data)
         assert result["slug"] == "first"
 
 
@@ -479,11 +806,11 @@ class TestParseMetadataFields:
 class TestDiscoverSessionNewFields:
     """Tests that discover_session populates cwd and git_branch."""
 
-    def test_cwd_and_git_branch_populated(self, tmp_path: Path):
+    def test_cwd_and_git_branch_populated(self):
         """discover_session extracts cwd and git_branch from metadata."""
         session_id = "meta-test-1234-5678-abcd-123456789abc"
-        lines = [
-            json.dumps({
+        entries = [
+            {
                 "type": "user",
                 "sessionId": session_id,
                 "timestamp": "2026-01-15T10:00:00.000Z",
@@ -491,13 +818,12 @@ class TestDiscoverSessionNewFields:
                 "version": "2.1.33",
                 "cwd": "/home/user/myproject",
                 "gitBranch": "develop",
-            }),
+            },
             _make_assistant_entry(session_id=session_id),
         ]
-        file_path = tmp_path / f"{session_id}.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
-
-        session = discover_session(file_path)
+        session = discover_session_from_bytes(
+            _jsonl_bytes(entries), Path(f"{session_id}.jsonl")
+        )
         assert session is not None
         assert session.cwd == "/home/user/myproject"
         assert session.git_branch == "develop"
@@ -519,7 +845,7 @@ class TestDiscoverSessionNewFields:
 class TestExtractFirstUserMessage:
     """Tests for the _extract_first_user_message helper."""
 
-    def test_string_content(self, tmp_path: Path):
+    def test_string_content(self):
         """Extracts plain string content from first user message."""
         lines = [
             json.dumps({"type": "file-history-snapshot", "sessionId": "s1"}),
@@ -529,13 +855,12 @@ class TestExtractFirstUserMessage:
                 "message": {"role": "user", "content": "Build me a dashboard"},
             }),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result == "Build me a dashboard"
 
-    def test_list_content_blocks(self, tmp_path: Path):
+    def test_list_content_blocks(self):
         """Extracts text from content block array."""
         lines = [
             json.dumps({
@@ -548,13 +873,12 @@ class TestExtractFirstUserMessage:
                 },
             }),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result == "Analyze the codebase"
 
-    def test_skips_non_user_entries(self, tmp_path: Path):
+    def test_skips_non_user_entries(self):
         """Non-user entries are skipped until first user entry found."""
         lines = [
             json.dumps({"type": "file-history-snapshot"}),
@@ -565,30 +889,27 @@ class TestExtractFirstUserMessage:
                 "message": {"role": "user", "content": "Hello Claude"},
             }),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result == "Hello Claude"
 
-    def test_empty_file(self, tmp_path: Path):
+    def test_empty_file(self):
         """Empty file returns None."""
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("")
+        data = b""
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result is None
 
-    def test_no_user_messages(self, tmp_path: Path):
+    def test_no_user_messages(self):
         """File without user messages returns None."""
         lines = [
             json.dumps({"type": "file-history-snapshot"}),
             json.dumps({"type": "assistant", "message": {"content": [{"type": "text", "text": "Hi"}]}}),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result is None
 
     def test_nonexistent_file(self, tmp_path: Path):
@@ -596,7 +917,7 @@ class TestExtractFirstUserMessage:
         result = _extract_first_user_message(tmp_path / "nope.jsonl")
         assert result is None
 
-    def test_interrupted_message(self, tmp_path: Path):
+    def test_interrupted_message(self):
         """Interrupted messages (with bracket syntax) are preserved."""
         lines = [
             json.dumps({
@@ -604,13 +925,12 @@ class TestExtractFirstUserMessage:
                 "message": {"role": "user", "content": "[Request interrupted by user for tool use]"},
             }),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result == "[Request interrupted by user for tool use]"
 
-    def test_whitespace_stripped(self, tmp_path: Path):
+    def test_whitespace_stripped(self):
         """Leading/trailing whitespace is stripped."""
         lines = [
             json.dumps({
@@ -618,34 +938,32 @@ class TestExtractFirstUserMessage:
                 "message": {"role": "user", "content": "  Fix the bug  \n"},
             }),
         ]
-        file_path = tmp_path / "test.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
+        data = ("\n".join(lines) + "\n").encode()
 
-        result = _extract_first_user_message(file_path)
+        result = _extract_first_user_message(data)
         assert result == "Fix the bug"
 
 
 class TestDiscoverSessionTitle:
     """Tests that discover_session populates the title field."""
 
-    def test_title_from_first_user_message(self, tmp_path: Path):
+    def test_title_from_first_user_message(self):
         """discover_session extracts the first user message as title."""
         session_id = "title-test-1234-5678-abcd-123456789abc"
-        lines = [
-            json.dumps({
+        entries = [
+            {
                 "type": "user",
                 "sessionId": session_id,
                 "timestamp": "2026-01-15T10:00:00.000Z",
                 "slug": "test-slug",
                 "version": "2.1.33",
                 "message": {"role": "user", "content": "Build a REST API"},
-            }),
+            },
             _make_assistant_entry(session_id=session_id),
         ]
-        file_path = tmp_path / f"{session_id}.jsonl"
-        file_path.write_text("\n".join(lines) + "\n")
-
-        session = discover_session(file_path)
+        session = discover_session_from_bytes(
+            _jsonl_bytes(entries), Path(f"{session_id}.jsonl")
+        )
         assert session is not None
         assert session.title == "Build a REST API"
 
@@ -656,3 +974,28 @@ class TestDiscoverSessionTitle:
         assert session is not None
         # _create_session_file uses _make_jsonl_entry which doesn't set message.content
         assert session.title is None
+
+    def test_title_after_metadata_scan_window(self):
+        """The single head pass keeps looking for a title past the metadata lines."""
+        session_id = "title-late-1234-5678-abcd-123456789abc"
+        entries = [
+            _make_jsonl_entry(
+                entry_type="progress",
+                session_id=session_id,
+                slug="late-title",
+                cwd="/Users/mike/proj",
+            )
+            for _ in range(12)
+        ]
+        entries.append(
+            _make_jsonl_entry(
+                session_id=session_id,
+                message={"role": "user", "content": "Fix the flaky test"},
+            )
+        )
+        buf = _jsonl_bytes(entries)
+        scan = _scan_session(buf)
+        assert scan is not None
+        assert scan.title == _extract_first_user_message(buf) == "Fix the flaky test"
+        assert scan.metadata == _parse_metadata_fields(buf)
+        assert scan.total_entries == 13
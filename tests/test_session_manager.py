@@ -1,39 +1,121 @@
 """Tests for SessionManager."""
 
 import pytest
-from datetime import datetime, timezone
-from sqlalchemy.ext.asyncio import AsyncSession
+import pytest_asyncio
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
 from src.core import (
     SessionManager,
     SessionNotFoundError,
     SessionStateError,
     ProjectNotFoundError,
+    PendingApproval,
 )
 from src.models import Project, Session, SessionStatus, Message
 
 
-@pytest.fixture
-async def project(db_session: AsyncSession) -> Project:
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def _module_conn(_shared_db_engine) -> AsyncConnection:
+    """One connection whose outer transaction spans this module.
+
+    The projects below are written into it once; each test then works in a
+    SAVEPOINT on top (see db_session) and everything is rolled back when the
+    module finishes.
+    """
+    async with _shared_db_engine.connect() as conn:
+        outer = await conn.begin()
+        try:
+            yield conn
+        finally:
+            await outer.rollback()
+
+
+async def _create_project(conn: AsyncConnection, **fields) -> Project:
+    async with AsyncSession(
+        bind=conn,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ) as session:
+        project = Project(**fields)
+        session.add(project)
+        await session.commit()
+        return project
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def project(_module_conn: AsyncConnection) -> Project:
     """Create a test project."""
-    project = Project(
+    return await _create_project(
+        _module_conn,
         name="Test Project",
         path="/test/project/path",
         permission_mode="default",
     )
-    db_session.add(project)
-    await db_session.commit()
-    await db_session.refresh(project)
-    return project
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def other_project(_module_conn: AsyncConnection) -> Project:
+    """A second project, for filtering tests."""
+    return await _create_project(_module_conn, name="Other", path="/other/path")
+
+
+@pytest.fixture
+async def db_session(_module_conn: AsyncConnection) -> AsyncSession:
+    """A session on the module connection, confined to a per-test SAVEPOINT.
+
+    The module's projects are visible; anything a test writes (including its
+    own commits) is rolled back at teardown.
+    """
+    savepoint = await _module_conn.begin_nested()
+    session = AsyncSession(
+        bind=_module_conn,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+        await savepoint.rollback()
+
+
+_PENDING_WRITE: PendingApproval = {
+    "tool_name": "Write",
+    "tool_input": {"path": "test.py", "content": "print('hi')"},
+    "tool_use_id": "toolu_123",
+    "file_path": "test.py",
+    "requested_at": "2026-02-06T00:00:00+00:00",
+}
+
+
+async def _transition(
+    manager: SessionManager, session_id: str, status: SessionStatus
+) -> Session:
+    """Move a session to status through the manager method that owns it."""
+    if status == SessionStatus.COMPLETED:
+        return await manager.complete_session(session_id)
+    if status == SessionStatus.ERROR:
+        return await manager.fail_session(session_id, "Something went wrong")
+    if status == SessionStatus.WAITING_APPROVAL:
+        return await manager.set_pending_approval(session_id, _PENDING_WRITE)
+    return await manager.update_session_status(session_id, status)
+
+
+@pytest.fixture
+def manager(db_session: AsyncSession) -> SessionManager:
+    """A SessionManager bound to the test's db_session."""
+    return SessionManager(db_session)
 
 
 class TestSessionManager:
     """Tests for the SessionManager class."""
 
-    async def test_create_session(self, db_session: AsyncSession, project: Project):
+    async def test_create_session(self, manager: SessionManager, project: Project):
         """Test creating a new session."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(
             project_id=project.id,
             name="My Session",
@@ -48,20 +130,30 @@ class TestSessionManager:
         assert session.message_count == 0
         assert session.total_cost_usd == 0.0
 
-    async def test_create_session_project_not_found(self, db_session: AsyncSession):
+    async def test_create_session_project_not_found(self, manager: SessionManager):
         """Test creating session with nonexistent project raises error."""
-        manager = SessionManager(db_session)
-
         with pytest.raises(ProjectNotFoundError, match="not found"):
             await manager.create_session(
                 project_id="nonexistent-uuid",
                 name="Orphan Session",
             )
 
-    async def test_get_session(self, db_session: AsyncSession, project: Project):
-        """Test getting a session by ID."""
-        manager = SessionManager(db_session)
+    async def test_create_sessions(self, manager: SessionManager, project: Project):
+        """Test creating several sessions at once."""
+        sessions = await manager.create_sessions(project.id, ["First", None, "Third"])
 
+        assert [s.name for s in sessions] == ["First", None, "Third"]
+        assert len({s.id for s in sessions}) == 3
+        assert all(s.status == SessionStatus.IDLE.value for s in sessions)
+        assert all(s.project_id == project.id for s in sessions)
+
+    async def test_create_sessions_project_not_found(self, manager: SessionManager):
+        """Test creating sessions for a nonexistent project raises error."""
+        with pytest.raises(ProjectNotFoundError, match="not found"):
+            await manager.create_sessions("nonexistent-uuid", ["Orphan"])
+
+    async def test_get_session(self, manager: SessionManager, project: Project):
+        """Test getting a session by ID."""
         created = await manager.create_session(
             project_id=project.id,
             name="Get Test",
@@ -72,34 +164,61 @@ class TestSessionManager:
         assert fetched.id == created.id
         assert fetched.name == "Get Test"
 
-    async def test_get_session_not_found(self, db_session: AsyncSession):
+    async def test_get_session_not_found(self, manager: SessionManager):
         """Test getting a nonexistent session raises error."""
-        manager = SessionManager(db_session)
-
         with pytest.raises(SessionNotFoundError, match="not found"):
             await manager.get_session("nonexistent-uuid")
 
     async def test_get_session_with_messages(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project, count_queries
     ):
         """Test getting a session with messages included."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
         await manager.update_session_status(session.id, SessionStatus.RUNNING)
         await manager.add_message(session.id, "user", "Hello!")
 
-        fetched = await manager.get_session(session.id, include_messages=True)
+        with count_queries() as q:
+            fetched = await manager.get_session(session.id, include_messages=True)
+            assert len(fetched.messages) == 1
+            assert fetched.messages[0].content == "Hello!"
+
+        # The session SELECT plus one SELECT ... IN for its messages; reading
+        # fetched.messages afterwards issues nothing
+        assert len(q) <= 2
+
+    async def test_get_session_without_messages_raises_on_access(
+        self, db_session: AsyncSession, manager: SessionManager, project: Project
+    ):
+        """Relationships not asked for raise instead of lazy loading."""
+        created = await manager.create_session(project_id=project.id)
+        db_session.expunge_all()
+
+        fetched = await manager.get_session(created.id)
+
+        with pytest.raises(InvalidRequestError):
+            _ = fetched.messages
+
+    async def test_delete_session_with_messages(
+        self, db_session: AsyncSession, manager: SessionManager, project: Project
+    ):
+        """Deleting a session also removes its messages."""
+        session = await manager.create_session(project_id=project.id)
+        await manager.add_message(session.id, "user", "Hello!")
+        db_session.expunge_all()
+
+        await manager.delete_session(session.id)
 
-        assert len(fetched.messages) == 1
-        assert fetched.messages[0].content == "Hello!"
+        with pytest.raises(SessionNotFoundError):
+            await manager.get_session(session.id)
+        remaining = await db_session.scalar(
+            select(func.count(Message.id)).where(Message.session_id == session.id)
+        )
+        assert remaining == 0
 
     async def test_get_session_by_claude_id(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project
     ):
         """Test getting a session by Claude's session ID."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
         await manager.update_session_status(
             session.id,
@@ -112,32 +231,33 @@ class TestSessionManager:
         assert fetched is not None
         assert fetched.id == session.id
 
-    async def test_list_sessions(self, db_session: AsyncSession, project: Project):
+    async def test_list_sessions(
+        self, manager: SessionManager, project: Project, count_queries
+    ):
         """Test listing sessions."""
-        manager = SessionManager(db_session)
+        await manager.create_sessions(project.id, [f"Session {i}" for i in range(3)])
 
-        for i in range(3):
-            await manager.create_session(
-                project_id=project.id,
-                name=f"Session {i}",
-            )
+        with count_queries() as q:
+            sessions = await manager.list_sessions()
+            names = sorted(s.name for s in sessions)
+
+        assert names == ["Session 0", "Session 1", "Session 2"]
+        assert len(q) <= 1
 
-        sessions = await manager.list_sessions()
+    async def test_list_sessions_limit_and_offset(
+        self, manager: SessionManager, project: Project
+    ):
+        """Pagination values aren't frozen into the cached statement."""
+        await manager.create_sessions(project.id, [f"Session {i}" for i in range(4)])
 
-        assert len(sessions) == 3
+        assert len(await manager.list_sessions(limit=2)) == 2
+        assert len(await manager.list_sessions(limit=3)) == 3
+        assert len(await manager.list_sessions(limit=3, offset=2)) == 2
 
     async def test_list_sessions_filter_by_project(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project, other_project: Project
     ):
         """Test listing sessions filtered by project."""
-        manager = SessionManager(db_session)
-
-        # Create another project
-        other_project = Project(name="Other", path="/other/path")
-        db_session.add(other_project)
-        await db_session.commit()
-        await db_session.refresh(other_project)
-
         # Create sessions in both projects
         await manager.create_session(project_id=project.id, name="P1 Session")
         await manager.create_session(project_id=other_project.id, name="P2 Session")
@@ -148,11 +268,9 @@ class TestSessionManager:
         assert sessions[0].name == "P1 Session"
 
     async def test_list_sessions_filter_by_status(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project
     ):
         """Test listing sessions filtered by status."""
-        manager = SessionManager(db_session)
-
         s1 = await manager.create_session(project_id=project.id, name="Idle")
         s2 = await manager.create_session(project_id=project.id, name="Running")
         await manager.update_session_status(s2.id, SessionStatus.RUNNING)
@@ -167,25 +285,73 @@ class TestSessionManager:
 
     # State Machine Tests
 
-    async def test_state_idle_to_running(
-        self, db_session: AsyncSession, project: Project
+    @pytest.mark.parametrize(
+        ("path", "target", "expected"),
+        [
+            pytest.param([], SessionStatus.RUNNING, SessionStatus.RUNNING, id="idle-to-running"),
+            pytest.param(
+                [SessionStatus.RUNNING], SessionStatus.COMPLETED, SessionStatus.COMPLETED,
+                id="running-to-completed",
+            ),
+            pytest.param(
+                [SessionStatus.RUNNING], SessionStatus.ERROR, SessionStatus.ERROR,
+                id="running-to-error",
+            ),
+            pytest.param(
+                [SessionStatus.RUNNING], SessionStatus.WAITING_APPROVAL,
+                SessionStatus.WAITING_APPROVAL, id="running-to-waiting-approval",
+            ),
+            pytest.param(
+                [SessionStatus.RUNNING, SessionStatus.WAITING_APPROVAL],
+                SessionStatus.RUNNING, SessionStatus.RUNNING, id="waiting-to-running",
+            ),
+            pytest.param(
+                [SessionStatus.RUNNING, SessionStatus.ERROR],
+                SessionStatus.RUNNING, SessionStatus.RUNNING, id="error-to-running",
+            ),
+            pytest.param([], SessionStatus.COMPLETED, SessionStateError, id="invalid-idle-to-completed"),
+            # COMPLETED→RUNNING is valid (resume), but COMPLETED→ERROR is not
+            pytest.param(
+                [SessionStatus.RUNNING, SessionStatus.COMPLETED],
+                SessionStatus.ERROR, SessionStateError, id="invalid-completed-to-error",
+            ),
+        ],
+    )
+    async def test_state_transition(
+        self,
+        manager: SessionManager,
+        project: Project,
+        path: list[SessionStatus],
+        target: SessionStatus,
+        expected: SessionStatus | type[Exception],
     ):
-        """Test valid transition: IDLE -> RUNNING."""
-        manager = SessionManager(db_session)
-
+        """Walk a session through path, then attempt the target transition."""
         session = await manager.create_session(project_id=project.id)
         assert session.status_enum == SessionStatus.IDLE
-
-        updated = await manager.update_session_status(session.id, SessionStatus.RUNNING)
-
-        assert updated.status_enum == SessionStatus.RUNNING
-
-    async def test_state_running_to_completed(
-        self, db_session: AsyncSession, project: Project
+        for status in path:
+            await _transition(manager, session.id, status)
+
+        if not isinstance(expected, SessionStatus):
+            with pytest.raises(expected, match="Invalid state transition"):
+                await _transition(manager, session.id, target)
+            return
+
+        updated = await _transition(manager, session.id, target)
+
+        assert updated.status_enum == expected
+        if expected == SessionStatus.RUNNING:
+            assert updated.error_message is None  # Cleared on retry
+            assert updated.pending_approval is None  # Cleared on approval
+        elif expected == SessionStatus.ERROR:
+            assert updated.error_message == "Something went wrong"
+        elif expected == SessionStatus.WAITING_APPROVAL:
+            assert updated.pending_approval["tool_name"] == "Write"
+            assert updated.pending_approval["tool_use_id"] == "toolu_123"
+
+    async def test_complete_session_adds_final_cost(
+        self, manager: SessionManager, project: Project
     ):
-        """Test valid transition: RUNNING -> COMPLETED."""
-        manager = SessionManager(db_session)
-
+        """complete_session folds the final cost in before completing."""
         session = await manager.create_session(project_id=project.id)
         await manager.update_session_status(session.id, SessionStatus.RUNNING)
 
@@ -194,138 +360,40 @@ class TestSessionManager:
         assert updated.status_enum == SessionStatus.COMPLETED
         assert updated.total_cost_usd == 0.05
 
-    async def test_state_running_to_error(
-        self, db_session: AsyncSession, project: Project
-    ):
-        """Test valid transition: RUNNING -> ERROR."""
-        manager = SessionManager(db_session)
-
-        session = await manager.create_session(project_id=project.id)
-        await manager.update_session_status(session.id, SessionStatus.RUNNING)
-
-        updated = await manager.fail_session(session.id, "Something went wrong")
-
-        assert updated.status_enum == SessionStatus.ERROR
-        assert updated.error_message == "Something went wrong"
-
-    async def test_state_running_to_waiting_approval(
-        self, db_session: AsyncSession, project: Project
-    ):
-        """Test valid transition: RUNNING -> WAITING_APPROVAL."""
-        manager = SessionManager(db_session)
-
-        session = await manager.create_session(project_id=project.id)
-        await manager.update_session_status(session.id, SessionStatus.RUNNING)
-
-        updated = await manager.set_pending_approval(
-            session.id,
-            {
-                "tool_name": "Write",
-                "tool_input": {"path": "test.py", "content": "print('hi')"},
-                "tool_use_id": "toolu_123",
-                "file_path": "test.py",
-                "requested_at": "2026-02-06T00:00:00+00:00",
-            },
-        )
-
-        assert updated.status_enum == SessionStatus.WAITING_APPROVAL
-        assert updated.pending_approval["tool_name"] == "Write"
-        assert updated.pending_approval["tool_use_id"] == "toolu_123"
-
-    async def test_state_waiting_to_running(
-        self, db_session: AsyncSession, project: Project
-    ):
-        """Test valid transition: WAITING_APPROVAL -> RUNNING (approve)."""
-        manager = SessionManager(db_session)
-
-        session = await manager.create_session(project_id=project.id)
-        await manager.update_session_status(session.id, SessionStatus.RUNNING)
-        await manager.set_pending_approval(
-            session.id,
-            {
-                "tool_name": "Write",
-                "tool_input": {},
-                "tool_use_id": "toolu_123",
-                "requested_at": "2026-02-06T00:00:00+00:00",
-            },
-        )
-
-        # Simulate approval
-        updated = await manager.update_session_status(session.id, SessionStatus.RUNNING)
-
-        assert updated.status_enum == SessionStatus.RUNNING
-        assert updated.pending_approval is None  # Cleared on transition
-
-    async def test_state_error_to_running(
-        self, db_session: AsyncSession, project: Project
-    ):
-        """Test valid transition: ERROR -> RUNNING (retry)."""
-        manager = SessionManager(db_session)
-
-        session = await manager.create_session(project_id=project.id)
-        await manager.update_session_status(session.id, SessionStatus.RUNNING)
-        await manager.fail_session(session.id, "Error!")
-
-        updated = await manager.update_session_status(session.id, SessionStatus.RUNNING)
-
-        assert updated.status_enum == SessionStatus.RUNNING
-        assert updated.error_message is None  # Cleared on retry
-
-    async def test_state_invalid_idle_to_completed(
-        self, db_session: AsyncSession, project: Project
-    ):
-        """Test invalid transition: IDLE -> COMPLETED raises error."""
-        manager = SessionManager(db_session)
-
-        session = await manager.create_session(project_id=project.id)
-
-        with pytest.raises(SessionStateError, match="Invalid state transition"):
-            await manager.update_session_status(session.id, SessionStatus.COMPLETED)
-
-    async def test_state_invalid_completed_to_anything(
-        self, db_session: AsyncSession, project: Project
-    ):
-        """Test that COMPLETED is terminal state."""
-        manager = SessionManager(db_session)
-
-        session = await manager.create_session(project_id=project.id)
-        await manager.update_session_status(session.id, SessionStatus.RUNNING)
-        await manager.complete_session(session.id)
-
-        # COMPLETED→RUNNING is valid (resume), but COMPLETED→ERROR is not
-        with pytest.raises(SessionStateError, match="Invalid state transition"):
-            await manager.update_session_status(session.id, SessionStatus.ERROR)
-
     # Message Tests
 
-    async def test_add_message(self, db_session: AsyncSession, project: Project):
+    async def test_add_message(
+        self, manager: SessionManager, project: Project, count_queries
+    ):
         """Test adding a message to a session."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
 
-        message = await manager.add_message(
-            session.id,
-            role="user",
-            content="Hello, Claude!",
-            message_type="user",
-            extra={"tokens": 5},
-        )
+        with count_queries() as q:
+            message = await manager.add_message(
+                session.id,
+                role="user",
+                content="Hello, Claude!",
+                message_type="user",
+                extra={"tokens": 5},
+            )
 
+        # The counter UPDATE and the message INSERT; no SELECT back
+        assert len(q) == 2
         assert message.id is not None
+        assert message.timestamp is not None
         assert message.role == "user"
         assert message.content == "Hello, Claude!"
         assert message.extra == {"tokens": 5}
 
-        # Check session was updated
-        updated_session = await manager.get_session(session.id)
+        # Check session was updated; it's still in the identity map, so no query
+        with count_queries() as q:
+            updated_session = await manager.get_session(session.id)
+        assert q == []
         assert updated_session.message_count == 1
         assert updated_session.last_prompt == "Hello, Claude!"
 
-    async def test_add_message_session_not_found(self, db_session: AsyncSession):
+    async def test_add_message_session_not_found(self, manager: SessionManager):
         """Test adding message to nonexistent session raises error."""
-        manager = SessionManager(db_session)
-
         with pytest.raises(SessionNotFoundError):
             await manager.add_message(
                 "nonexistent-uuid",
@@ -333,65 +401,139 @@ class TestSessionManager:
                 content="Hello!",
             )
 
-    async def test_get_messages(self, db_session: AsyncSession, project: Project):
+    async def test_get_messages(
+        self, manager: SessionManager, project: Project, count_queries
+    ):
         """Test getting messages from a session."""
-        manager = SessionManager(db_session)
+        session = await manager.create_session(project_id=project.id)
+
+        await manager.add_messages(session.id, [
+            {"role": "user", "content": "First"},
+            {"role": "assistant", "content": "Second"},
+            {"role": "user", "content": "Third"},
+        ])
 
+        with count_queries() as q:
+            messages = await manager.get_messages(session.id)
+            contents = [m.content for m in messages]
+
+        assert contents == ["First", "Second", "Third"]
+        assert len(q) <= 1
+
+    async def test_add_messages_updates_session(
+        self, manager: SessionManager, project: Project
+    ):
+        """Bulk add bumps message_count and last_prompt like add_message."""
         session = await manager.create_session(project_id=project.id)
 
-        await manager.add_message(session.id, "user", "First")
-        await manager.add_message(session.id, "assistant", "Second")
-        await manager.add_message(session.id, "user", "Third")
+        created = await manager.add_messages(session.id, [
+            {"role": "user", "content": "Question", "extra": {"tokens": 3}},
+            {"role": "assistant", "content": "Answer", "message_type": "assistant"},
+        ])
+
+        assert [m.content for m in created] == ["Question", "Answer"]
+        assert all(m.id for m in created)
+        assert created[0].extra == {"tokens": 3}
+
+        updated = await manager.get_session(session.id)
+        assert updated.message_count == 2
+        assert updated.last_prompt == "Question"
+
+    async def test_add_message_after_batch_sorts_last(
+        self, manager: SessionManager, project: Project
+    ):
+        """Batch timestamps end at now, so a message a microsecond later follows them."""
+        session = await manager.create_session(project_id=project.id)
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+        with patch("src.core.session_manager.utc_now", return_value=now):
+            await manager.add_messages(session.id, [
+                {"role": "user", "content": "First"},
+                {"role": "assistant", "content": "Second"},
+                {"role": "user", "content": "Third"},
+            ])
+        await manager.add_message(
+            session.id, "assistant", "Fourth", timestamp=now + timedelta(microseconds=1)
+        )
 
         messages = await manager.get_messages(session.id)
 
-        assert len(messages) == 3
-        assert [m.content for m in messages] == ["First", "Second", "Third"]
+        assert [m.content for m in messages] == ["First", "Second", "Third", "Fourth"]
+
+    async def test_add_messages_session_not_found(self, manager: SessionManager):
+        """Bulk add to a nonexistent session raises error."""
+        with pytest.raises(SessionNotFoundError):
+            await manager.add_messages("nonexistent-uuid", [{"role": "user", "content": "Hi"}])
 
     async def test_get_messages_with_limit(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project
     ):
         """Test getting messages with a limit."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
 
-        for i in range(5):
-            await manager.add_message(session.id, "user", f"Message {i}")
+        await manager.add_messages(
+            session.id,
+            [{"role": "user", "content": f"Message {i}"} for i in range(5)],
+        )
 
         messages = await manager.get_messages(session.id, limit=3)
 
         assert len(messages) == 3
 
-    async def test_get_messages_since(self, db_session: AsyncSession, project: Project):
+    async def test_get_messages_since(self, manager: SessionManager, project: Project):
         """Test getting messages since a timestamp."""
-        import asyncio
-
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
 
-        await manager.add_message(session.id, "user", "Old message")
-        await asyncio.sleep(0.01)
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        cutoff = t0 + timedelta(seconds=1)
 
-        cutoff = datetime.now(timezone.utc)
-        await asyncio.sleep(0.01)
-
-        await manager.add_message(session.id, "user", "New message")
+        await manager.add_message(session.id, "user", "Old message", timestamp=t0)
+        await manager.add_message(
+            session.id, "user", "New message", timestamp=cutoff + timedelta(seconds=1)
+        )
 
         messages = await manager.get_messages(session.id, since=cutoff)
 
         assert len(messages) == 1
         assert messages[0].content == "New message"
 
+    # Transaction Tests
+
+    async def test_transaction_commits_once(
+        self, db_session: AsyncSession, manager: SessionManager, project: Project
+    ):
+        """Calls inside transaction() share a single commit."""
+        with patch.object(db_session, "commit", wraps=db_session.commit) as commit:
+            async with manager.transaction():
+                session = await manager.create_session(project_id=project.id)
+                await manager.add_message(session.id, "user", "Hello!")
+                await manager.update_session_status(session.id, SessionStatus.RUNNING)
+
+        assert commit.await_count == 1
+        fetched = await manager.get_session(session.id)
+        assert fetched.message_count == 1
+        assert fetched.status_enum == SessionStatus.RUNNING
+
+    async def test_transaction_rolls_back_on_error(
+        self, db_session: AsyncSession, manager: SessionManager, project: Project
+    ):
+        """An exception inside transaction() discards everything it wrote."""
+        with pytest.raises(RuntimeError):
+            async with manager.transaction():
+                session = await manager.create_session(project_id=project.id)
+                session_id = session.id
+                raise RuntimeError("boom")
+
+        db_session.expunge_all()
+        with pytest.raises(SessionNotFoundError):
+            await manager.get_session(session_id)
+
     # Cost Tracking Tests
 
     async def test_update_session_cost(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project
     ):
         """Test updating session cost."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
 
         await manager.update_session_cost(session.id, 0.01)
@@ -403,11 +545,9 @@ class TestSessionManager:
     # Claude Session ID Tests
 
     async def test_set_claude_session_id(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project
     ):
         """Test setting Claude's session ID on transition."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
 
         updated = await manager.update_session_status(
@@ -419,11 +559,9 @@ class TestSessionManager:
         assert updated.claude_session_id == "claude-session-xyz"
 
     async def test_pending_approval_requires_running(
-        self, db_session: AsyncSession, project: Project
+        self, manager: SessionManager, project: Project
     ):
         """Test that setting pending approval requires RUNNING state."""
-        manager = SessionManager(db_session)
-
         session = await manager.create_session(project_id=project.id)
 
         with pytest.raises(SessionStateError, match="RUNNING state"):
@@ -1,89 +1,128 @@
 """Tests for the session reader utility that parses Claude Code JSONL files."""
 
-import json
-import tempfile
+import hashlib
+from collections.abc import Sequence
 from pathlib import Path
 
 import pytest
 
-from src.utils.session_reader import read_session_messages, ParsedMessage, SessionMeta
+from src.utils import fast_json
+from src.utils.session_reader import (
+    read_session_messages,
+    read_session_messages_from_bytes,
+    ParsedMessage,
+    SessionMeta,
+)
 
 
-def _write_jsonl(lines: list[dict]) -> str:
-    """Write a list of dicts as a JSONL temp file, returning the path."""
-    f = tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False)
-    for line in lines:
-        f.write(json.dumps(line) + "\n")
-    f.close()
-    return f.name
+@pytest.fixture(scope="session")
+def jsonl_writer(tmp_path_factory):
+    """Return a writer that turns a list of dicts into a JSONL file path.
 
+    Files are keyed by a digest of their content, so identical fixtures are
+    written once per session and reused by every test that asks for them.
+    """
+    directory = tmp_path_factory.mktemp("session-reader")
+    written: dict[str, str] = {}
 
-# ── Metadata extraction ──────────────────────────────────────────────
+    def write(lines: Sequence[dict]) -> str:
+        payload = bytearray()
+        for line in lines:
+            payload += fast_json.dumps(line)
+            payload.append(0x0A)
+        digest = hashlib.sha1(payload).hexdigest()
+        path = written.get(digest)
+        if path is None:
+            file_path = directory / f"{digest}.jsonl"
+            file_path.write_bytes(payload)
+            path = written[digest] = str(file_path)
+        return path
 
+    return write
 
-class TestSessionMeta:
-    """Tests for metadata extraction from JSONL files."""
 
-    def test_extracts_metadata_from_first_entry(self):
-        path = _write_jsonl([
-            {
-                "type": "user",
-                "sessionId": "ses-123",
-                "slug": "fix-auth-bug",
-                "version": "1.2.3",
-                "timestamp": "2025-01-01T10:00:00Z",
-                "message": {"content": "Hello"},
-            },
-        ])
-        meta, _ = read_session_messages(path)
+def _assert_meta(meta: SessionMeta, **expected) -> None:
+    """Assert that each named SessionMeta field has the expected value."""
+    for field_name, value in expected.items():
+        assert getattr(meta, field_name) == value, field_name
 
-        assert meta.session_id == "ses-123"
-        assert meta.slug == "fix-auth-bug"
-        assert meta.claude_code_version == "1.2.3"
-        assert meta.started_at == "2025-01-01T10:00:00Z"
 
-    def test_ended_at_from_last_timestamp(self):
-        path = _write_jsonl([
-            {
-                "type": "user",
-                "sessionId": "ses-1",
-                "timestamp": "2025-01-01T10:00:00Z",
-                "message": {"content": "Hello"},
-            },
-            {
-                "type": "assistant",
-                "timestamp": "2025-01-01T10:05:00Z",
-                "message": {"content": [{"type": "text", "text": "Hi"}]},
-            },
-        ])
-        meta, _ = read_session_messages(path)
-
-        assert meta.ended_at == "2025-01-01T10:05:00Z"
+# ── Metadata extraction ──────────────────────────────────────────────
 
-    def test_model_extracted_from_first_assistant(self):
-        path = _write_jsonl([
-            {
-                "type": "user",
-                "sessionId": "ses-1",
-                "timestamp": "2025-01-01T10:00:00Z",
-                "message": {"content": "Hello"},
-            },
-            {
-                "type": "assistant",
-                "timestamp": "2025-01-01T10:01:00Z",
-                "message": {
-                    "model": "claude-opus-4-6",
-                    "content": [{"type": "text", "text": "Hello"}],
-                },
-            },
-        ])
-        meta, _ = read_session_messages(path)
 
-        assert meta.model == "claude-opus-4-6"
+class TestSessionMeta:
+    """Tests for metadata extraction from JSONL files."""
 
-    def test_falls_back_to_filename_stem_for_session_id(self):
+    @pytest.mark.parametrize(
+        "entries,expected",
+        [
+            # Identity fields come from the first entry
+            (
+                [
+                    {
+                        "type": "user",
+                        "sessionId": "ses-123",
+                        "slug": "fix-auth-bug",
+                        "version": "1.2.3",
+                        "timestamp": "2025-01-01T10:00:00Z",
+                        "message": {"content": "Hello"},
+                    },
+                ],
+                {
+                    "session_id": "ses-123",
+                    "slug": "fix-auth-bug",
+                    "claude_code_version": "1.2.3",
+                    "started_at": "2025-01-01T10:00:00Z",
+                },
+            ),
+            # ended_at comes from the last timestamp
+            (
+                [
+                    {
+                        "type": "user",
+                        "sessionId": "ses-1",
+                        "timestamp": "2025-01-01T10:00:00Z",
+                        "message": {"content": "Hello"},
+                    },
+                    {
+                        "type": "assistant",
+                        "timestamp": "2025-01-01T10:05:00Z",
+                        "message": {"content": [{"type": "text", "text": "Hi"}]},
+                    },
+                ],
+                {"ended_at": "2025-01-01T10:05:00Z"},
+            ),
+            # model comes from the first assistant entry that has one
+            (
+                [
+                    {
+                        "type": "user",
+                        "sessionId": "ses-1",
+                        "timestamp": "2025-01-01T10:00:00Z",
+                        "message": {"content": "Hello"},
+                    },
+                    {
+                        "type": "assistant",
+                        "timestamp": "2025-01-01T10:01:00Z",
+                        "message": {
+                            "model": "claude-opus-4-6",
+                            "content": [{"type": "text", "text": "Hello"}],
+                        },
+                    },
+                ],
+                {"model": "claude-opus-4-6"},
+            ),
+        ],
+        ids=["first-entry", "ended-at", "model"],
+    )
+    def test_metadata(self, jsonl_writer, entries, expected):
+        meta, _ = read_session_messages(jsonl_writer(entries))
+
+        _assert_meta(meta, **expected)
+
+    def test_falls_back_to_filename_stem_for_session_id(self, jsonl_writer):
         """When sessionId is absent, use the file stem."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "user",
                 "timestamp": "2025-01-01T10:00:00Z",
@@ -102,8 +141,8 @@ class TestSessionMeta:
 class TestUserMessages:
     """Tests for parsing 'type: user' entries."""
 
-    def test_simple_string_content(self):
-        path = _write_jsonl([
+    def test_simple_string_content(self, jsonl_writer):
+        path = jsonl_writer([
             {
                 "type": "user",
                 "uuid": "u1",
@@ -120,9 +159,9 @@ class TestUserMessages:
         assert msgs[0].message_type == "user"
         assert msgs[0].id == "u1"
 
-    def test_tool_result_content_blocks(self):
+    def test_tool_result_content_blocks(self, jsonl_writer):
         """User entries with content blocks containing tool_result."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "user",
                 "uuid": "u2",
@@ -149,9 +188,9 @@ class TestUserMessages:
         assert msgs[0].metadata["tool_use_id"] == "tool-abc"
         assert msgs[0].metadata["is_error"] is False
 
-    def test_tool_result_with_nested_text_content(self):
+    def test_tool_result_with_nested_text_content(self, jsonl_writer):
         """Tool results where content is a list of text blocks."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "user",
                 "uuid": "u3",
@@ -176,9 +215,9 @@ class TestUserMessages:
         assert len(msgs) == 1
         assert msgs[0].content == "line 1\nline 2"
 
-    def test_multiple_content_blocks_get_suffixed_ids(self):
+    def test_multiple_content_blocks_get_suffixed_ids(self, jsonl_writer):
         """Multiple blocks in one entry get -0, -1 suffixes."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "user",
                 "uuid": "u4",
@@ -209,8 +248,8 @@ class TestUserMessages:
 class TestAssistantMessages:
     """Tests for parsing 'type: assistant' entries."""
 
-    def test_single_text_block(self):
-        path = _write_jsonl([
+    def test_single_text_block(self, jsonl_writer):
+        path = jsonl_writer([
             {
                 "type": "assistant",
                 "uuid": "a1",
@@ -230,8 +269,8 @@ class TestAssistantMessages:
         assert msgs[0].message_type == "text"
         assert msgs[0].metadata["model"] == "claude-sonnet-4-5"
 
-    def test_tool_use_block(self):
-        path = _write_jsonl([
+    def test_tool_use_block(self, jsonl_writer):
+        path = jsonl_writer([
             {
                 "type": "assistant",
                 "uuid": "a2",
@@ -260,9 +299,9 @@ class TestAssistantMessages:
         assert msgs[0].metadata["tool_input"]["file"] == "main.py"
         assert msgs[0].metadata["tool_use_id"] == "tu-1"
 
-    def test_mixed_text_and_tool_use_blocks(self):
+    def test_mixed_text_and_tool_use_blocks(self, jsonl_writer):
         """Assistant entry with both text and tool_use blocks."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "assistant",
                 "uuid": "a3",
@@ -289,9 +328,9 @@ class TestAssistantMessages:
         assert msgs[1].role == "tool_use"
         assert msgs[1].id == "a3-1"
 
-    def test_empty_text_block_skipped(self):
+    def test_empty_text_block_skipped(self, jsonl_writer):
         """Text blocks with empty string are filtered out."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "assistant",
                 "uuid": "a4",
@@ -317,8 +356,8 @@ class TestAssistantMessages:
 class TestSkippedEntries:
     """Tests that non-displayable entry types are ignored."""
 
-    def test_progress_entries_skipped(self):
-        path = _write_jsonl([
+    def test_progress_entries_skipped(self, jsonl_writer):
+        path = jsonl_writer([
             {
                 "type": "user",
                 "uuid": "u1",
@@ -350,8 +389,8 @@ class TestSkippedEntries:
         assert len(msgs) == 1
         assert msgs[0].role == "user"
 
-    def test_file_history_snapshot_skipped(self):
-        path = _write_jsonl([
+    def test_file_history_snapshot_skipped(self, jsonl_writer):
+        path = jsonl_writer([
             {
                 "type": "file-history-snapshot",
                 "uuid": "fhs-1",
@@ -377,35 +416,48 @@ class TestSkippedEntries:
 class TestEdgeCases:
     """Tests for edge cases and error handling."""
 
-    def test_empty_file(self):
-        path = _write_jsonl([])
+    def test_empty_file(self, jsonl_writer):
+        path = jsonl_writer([])
         meta, msgs = read_session_messages(path)
 
         assert msgs == []
         # session_id falls back to file stem
         assert meta.session_id == Path(path).stem
 
-    def test_malformed_json_lines_skipped(self):
+    def test_malformed_json_lines_skipped(self, tmp_path):
         """Malformed lines are skipped, valid lines are still parsed."""
-        f = tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False)
-        f.write('{"type":"user","uuid":"u1","sessionId":"ses-1","timestamp":"T","message":{"content":"Good"}}\n')
-        f.write("this is not json\n")
-        f.write('{"type":"assistant","uuid":"a1","sessionId":"ses-1","timestamp":"T","message":{"content":[{"type":"text","text":"Also good"}]}}\n')
-        f.close()
+        path = tmp_path / "malformed.jsonl"
+        path.write_bytes(
+            b'{"type":"user","uuid":"u1","sessionId":"ses-1","timestamp":"T","message":{"content":"Good"}}\n'
+            b"this is not json\n"
+            b'{"type":"assistant","uuid":"a1","sessionId":"ses-1","timestamp":"T","message":{"content":[{"type":"text","text":"Also good"}]}}\n'
+        )
 
-        _, msgs = read_session_messages(f.name)
+        _, msgs = read_session_messages(str(path))
 
         assert len(msgs) == 2
         assert msgs[0].role == "user"
         assert msgs[1].role == "assistant"
 
+    def test_invalid_utf8_is_replaced_not_skipped(self, tmp_path):
+        """Undecodable bytes are replaced rather than dropping the line."""
+        path = tmp_path / "latin1.jsonl"
+        path.write_bytes(
+            b'{"type":"user","uuid":"u1","sessionId":"ses-1","timestamp":"T","message":{"content":"caf\xe9"}}\n'
+        )
+
+        _, msgs = read_session_messages(path)
+
+        assert len(msgs) == 1
+        assert msgs[0].content == "caf\ufffd"
+
     def test_file_not_found(self):
         with pytest.raises(FileNotFoundError):
             read_session_messages("/nonexistent/path/abc123.jsonl")
 
-    def test_assistant_with_non_list_content(self):
+    def test_assistant_with_non_list_content(self, jsonl_writer):
         """If assistant content is not a list, produce no messages."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "assistant",
                 "uuid": "a1",
@@ -418,9 +470,9 @@ class TestEdgeCases:
 
         assert msgs == []
 
-    def test_single_block_gets_no_suffix(self):
+    def test_single_block_gets_no_suffix(self, jsonl_writer):
         """Single-block entries use the raw uuid without -0 suffix."""
-        path = _write_jsonl([
+        path = jsonl_writer([
             {
                 "type": "assistant",
                 "uuid": "a1",
@@ -439,71 +491,75 @@ class TestEdgeCases:
 # ── Full conversation flow ───────────────────────────────────────────
 
 
+# Six-entry transcript shared by the end-to-end test; never mutated.
+_REALISTIC_SESSION = (
+    {
+        "type": "user",
+        "uuid": "u1",
+        "sessionId": "ses-abc",
+        "slug": "implement-auth",
+        "version": "1.5.0",
+        "timestamp": "2025-06-01T09:00:00Z",
+        "message": {"content": "Add JWT authentication"},
+    },
+    {
+        "type": "assistant",
+        "uuid": "a1",
+        "sessionId": "ses-abc",
+        "timestamp": "2025-06-01T09:00:05Z",
+        "message": {
+            "model": "claude-opus-4-6",
+            "content": [
+                {"type": "text", "text": "I'll add JWT auth. Let me read the current code."},
+                {"type": "tool_use", "id": "tu-1", "name": "Read", "input": {"file": "auth.py"}},
+            ],
+        },
+    },
+    {
+        "type": "user",
+        "uuid": "u2",
+        "sessionId": "ses-abc",
+        "timestamp": "2025-06-01T09:00:06Z",
+        "message": {
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": "tu-1",
+                    "content": "# auth.py\ndef login(): pass",
+                },
+            ],
+        },
+    },
+    {
+        "type": "progress",
+        "sessionId": "ses-abc",
+        "timestamp": "2025-06-01T09:00:07Z",
+    },
+    {
+        "type": "assistant",
+        "uuid": "a2",
+        "sessionId": "ses-abc",
+        "timestamp": "2025-06-01T09:00:10Z",
+        "message": {
+            "model": "claude-opus-4-6",
+            "content": [
+                {"type": "text", "text": "I've implemented JWT auth."},
+            ],
+        },
+    },
+    {
+        "type": "result",
+        "sessionId": "ses-abc",
+        "timestamp": "2025-06-01T09:00:15Z",
+    },
+)
+
+
 class TestFullConversation:
     """End-to-end test with a realistic multi-turn conversation."""
 
-    def test_realistic_session(self):
-        path = _write_jsonl([
-            {
-                "type": "user",
-                "uuid": "u1",
-                "sessionId": "ses-abc",
-                "slug": "implement-auth",
-                "version": "1.5.0",
-                "timestamp": "2025-06-01T09:00:00Z",
-                "message": {"content": "Add JWT authentication"},
-            },
-            {
-                "type": "assistant",
-                "uuid": "a1",
-                "sessionId": "ses-abc",
-                "timestamp": "2025-06-01T09:00:05Z",
-                "message": {
-                    "model": "claude-opus-4-6",
-                    "content": [
-                        {"type": "text", "text": "I'll add JWT auth. Let me read the current code."},
-                        {"type": "tool_use", "id": "tu-1", "name": "Read", "input": {"file": "auth.py"}},
-                    ],
-                },
-            },
-            {
-                "type": "user",
-                "uuid": "u2",
-                "sessionId": "ses-abc",
-                "timestamp": "2025-06-01T09:00:06Z",
-                "message": {
-                    "content": [
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": "tu-1",
-                            "content": "# auth.py\ndef login(): pass",
-                        },
-                    ],
-                },
-            },
-            {
-                "type": "progress",
-                "sessionId": "ses-abc",
-                "timestamp": "2025-06-01T09:00:07Z",
-            },
-            {
-                "type": "assistant",
-                "uuid": "a2",
-                "sessionId": "ses-abc",
-                "timestamp": "2025-06-01T09:00:10Z",
-                "message": {
-                    "model": "claude-opus-4-6",
-                    "content": [
-                        {"type": "text", "text": "I've implemented JWT auth."},
-                    ],
-                },
-            },
-            {
-                "type": "result",
-                "sessionId": "ses-abc",
-                "timestamp": "2025-06-01T09:00:15Z",
-            },
-        ])
+    def test_realistic_session(self, jsonl_writer):
+        path = jsonl_writer(_REALISTIC_SESSION)
 
         meta, msgs = read_session_messages(path)
 
@@ -538,3 +594,11 @@ class TestFullConversation:
         # a2: final assistant text
         assert msgs[4].role == "assistant"
         assert msgs[4].content == "I've implemented JWT auth."
+
+    def test_from_bytes_matches_path(self, jsonl_writer):
+        """Parsing the file's bytes gives the same result as parsing the path."""
+        path = jsonl_writer(_REALISTIC_SESSION)
+
+        from_bytes = read_session_messages_from_bytes(Path(path).read_bytes(), path)
+
+        assert from_bytes == read_session_messages(path)
@@ -0,0 +1,82 @@
+"""Throughput benchmark for read_session_messages on a large transcript.
+
+Skipped by default. Run with:
+
+    RUN_BENCHMARKS=1 pytest -m benchmark -s tests/test_session_reader_bench.py
+"""
+
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from src.utils import fast_json
+from src.utils.session_reader import read_session_messages
+from tests.test_session_reader import _REALISTIC_SESSION
+
+# Lines in the synthesized transcript
+BENCH_LINES = 100_000
+
+# Timed runs; the best one is reported
+BENCH_ROUNDS = 5
+
+# Displayable messages produced by one copy of _REALISTIC_SESSION
+_MESSAGES_PER_COPY = 5
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        not os.environ.get("RUN_BENCHMARKS"),
+        reason="RUN_BENCHMARKS not set - skipping benchmark",
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def large_transcript(tmp_path_factory):
+    """Write a ~BENCH_LINES-line transcript built from repeated realistic turns.
+
+    Each copy gets unique uuids so message ids stay distinct, as they would in
+    a real long-running session.
+    """
+    copies = BENCH_LINES // len(_REALISTIC_SESSION)
+    payload = bytearray()
+    for i in range(copies):
+        for entry in _REALISTIC_SESSION:
+            if "uuid" in entry:
+                entry = {**entry, "uuid": f"{entry['uuid']}-{i}"}
+            payload += fast_json.dumps(entry)
+            payload.append(0x0A)
+
+    path = tmp_path_factory.mktemp("bench") / "large.jsonl"
+    path.write_bytes(payload)
+    return path, copies
+
+
+def test_read_session_messages_throughput(large_transcript):
+    path, copies = large_transcript
+    size_mb = path.stat().st_size / 1_000_000
+
+    # Warm the page cache so every round measures parsing, not disk
+    _, messages = read_session_messages(path)
+    assert len(messages) == copies * _MESSAGES_PER_COPY
+
+    best = float("inf")
+    for _ in range(BENCH_ROUNDS):
+        start = time.perf_counter()
+        read_session_messages(path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        read_session_messages(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(
+        f"\nread_session_messages: {size_mb:.1f} MB, {copies * len(_REALISTIC_SESSION)} lines"
+        f" | best {best * 1000:.1f} ms ({size_mb / best:.1f} MB/s)"
+        f" | peak alloc {peak / 1_000_000:.1f} MB"
+    )